@@ -0,0 +1,41 @@
+import numpy as np
+
+from common import Result, Content
+from game_engine import GameEngine
+from list2d import Array2D
+
+
+class ArrayGameEngine(GameEngine):
+    """ GameEngine whose mine and minefield grids are stored as int8 NumPy
+    arrays. Board generation is vectorized, the rest of the engine and the
+    solver work through the List2D compatible Array2D"""
+
+    def generate_minefield(self, mines=None):
+        if mines is None:
+            mines = self._sample_mines()
+        self.mine_count = len(mines)
+        indices = mines
+        mines = np.zeros((self.rows, self.cols), dtype=np.bool_)
+        mines.flat[list(indices)] = 1
+
+        # 3x3 convolution of the mine mask done as a sum of shifted slices
+        padded = np.pad(mines, 1).astype(np.int8)
+        counts = sum(
+            padded[dr:dr + self.rows, dc:dc + self.cols]
+            for dr in range(3) for dc in range(3)
+            if dr != 1 or dc != 1
+        )
+        counts[mines] = -10
+        self._mines = counts
+        self._mine_positions = [self._tables.positions[i] for i in indices]
+        self.minefield = Array2D(
+            np.full((self.rows, self.cols), Content.Unknown, dtype=np.int8)
+        )
+        self.flags = 0
+        self.result = Result.OK
+        self._reset_counters()
+        self.new_game_event.notify()
+
+    def is_unknown(self, r, c):
+        value = self.minefield.array.item(r, c)
+        return value == Content.Unknown or value == Content.QuestionMark
@@ -0,0 +1,164 @@
+"""Lockstep simulation of many boards of one size with NumPy.
+
+The boards of a batch are stacked into (boards, rows, cols) arrays. The
+first click, the zero cascades and the simple rules (flags == number digs
+the other cells around, flags + unknowns == number flags them) run on all
+boards at once, and only the boards where those get stuck are replayed
+into a scalar engine and finished by MinesweeperSolver.
+"""
+import numpy as np
+
+from common import Result, Content
+from engines import create_engine
+from solver import MinesweeperSolver
+
+
+def _neighbour_counts(masks):
+    """Number of set cells around every cell of a stack of boolean boards"""
+    boards, rows, cols = masks.shape
+    padded = np.pad(masks.view(np.int8), ((0, 0), (1, 1), (1, 1)))
+    return sum(
+        padded[:, dr:dr + rows, dc:dc + cols]
+        for dr in range(3) for dc in range(3)
+        if dr != 1 or dc != 1
+    )
+
+
+class BatchEngine:
+    """ Boards of one size stored as boolean (boards, rows, cols) arrays of
+    mines, revealed cells and flags, with the mine counts around every cell
+    and a Result value per board"""
+
+    def __init__(self, rows, cols, layouts):
+        self.rows = rows
+        self.cols = cols
+        self.mines = np.zeros((len(layouts), rows, cols), dtype=np.bool_)
+        for k, mines in enumerate(layouts):
+            self.mines[k].flat[list(mines)] = True
+        self.counts = _neighbour_counts(self.mines)
+        self.safe_counts = rows * cols - self.mines.sum(axis=(1, 2))
+        self.revealed = np.zeros_like(self.mines)
+        self.flags = np.zeros_like(self.mines)
+        self.result = np.full(len(layouts), Result.OK.value, dtype=np.int8)
+        # cells revealed or flagged by the simple rules
+        self.rule_cells = 0
+
+    def __len__(self):
+        return len(self.result)
+
+    def dig(self, cells):
+        """Digs one (r, c) cell on every board"""
+        boards = np.arange(len(self))
+        rows, cols = np.asarray(cells).T
+        self.revealed[boards, rows, cols] = True
+        self.result[self.mines[boards, rows, cols]] = Result.Loss.value
+
+    def solve_simple(self):
+        """Applies the cascades and the simple rules to every board in
+        progress until no board changes. Returns the indices of the boards
+        which are still in progress"""
+        active = np.flatnonzero(self.result == Result.OK.value)
+        while active.size:
+            revealed = self.revealed[active]
+            flags = self.flags[active]
+            counts = self.counts[active]
+            unknown = ~(revealed | flags)
+            flags_around = _neighbour_counts(flags)
+            unknowns_around = _neighbour_counts(unknown)
+            open_cells = revealed & (unknowns_around > 0)
+            # a revealed zero has no flags around, so it digs its
+            # neighbours like any satisfied number
+            satisfied = open_cells & (flags_around == counts)
+            full = open_cells & (flags_around + unknowns_around == counts)
+            dig = unknown & (_neighbour_counts(satisfied) > 0)
+            flag = unknown & (_neighbour_counts(full) > 0)
+            changed = (dig | flag).any(axis=(1, 2))
+            self.rule_cells += int(dig.sum() + flag.sum())
+            revealed |= dig
+            flags |= flag
+            self.revealed[active] = revealed
+            self.flags[active] = flags
+            won = (revealed.sum(axis=(1, 2))
+                   == self.safe_counts[active])
+            self.result[active[won]] = Result.Win.value
+            active = active[changed & ~won]
+        return np.flatnonzero(self.result == Result.OK.value)
+
+    def replay(self, k, engine):
+        """Brings a scalar engine, whose mines are those of board k, to the
+        state of the board"""
+        for r, c in zip(*np.nonzero(self.flags[k])):
+            engine.set_flag(int(r), int(c), Content.Flag)
+        for r, c in zip(*np.nonzero(self.revealed[k])):
+            engine.dig(int(r), int(c))
+
+
+def play_batch(game, count, engine='list', solver_options=None, seed=None,
+               boards=None, batch_size=1000):
+    """Plays count games like simulate.play_games, batch_size boards at a
+    time in lockstep. Boards and first clicks are drawn from the seed
+    exactly as play_games and the solver's first guess draw them, and the
+    draws are redone for a board handed to the solver, so seeded results
+    match play_games. The moves made in lockstep are not counted as Simple
+    Explore moves, which only cover the boards handed off, but as
+    lockstep_cells in the solver stats"""
+    from simulate import SimulationStats
+
+    scalar = create_engine(game, engine)
+    solver = MinesweeperSolver(scalar, report=False, **(solver_options or {}))
+    rows, cols = scalar.rows, scalar.cols
+    stats = SimulationStats()
+
+    def start_game(i):
+        """Sets up game i of the run and returns its mines and first click,
+        leaving the rng where play_games leaves it after the first click"""
+        if seed is not None:
+            scalar.rng.seed(seed + i)
+        if boards is not None:
+            mines, first = boards[i]
+            scalar.generate_minefield(mines)
+            solver.reset()
+            return mines, first
+        scalar.generate_minefield()
+        solver.reset()
+        # the solver's first move is a guess on the blank board
+        return scalar.mine_indices(), solver._get_best_guess()
+
+    for start in range(0, count, batch_size):
+        layouts = []
+        first_clicks = []
+        for i in range(start, min(count, start + batch_size)):
+            mines, first = start_game(i)
+            layouts.append(mines)
+            first_clicks.append(first)
+
+        batch = BatchEngine(rows, cols, layouts)
+        batch.dig(first_clicks)
+        stuck = batch.solve_simple()
+        wins = int((batch.result == Result.Win.value).sum())
+        losses = int((batch.result == Result.Loss.value).sum())
+        stats.games += wins + losses
+        stats.wins += wins
+        stats.losses += losses
+        if boards is None:
+            # the first click of every board is a guess
+            stats.count_random += len(batch)
+        if losses:
+            stats.loss_by['Random Explore'] += losses
+        solver.stats.count('lockstep_wins', wins)
+        solver.stats.count('lockstep_handoffs', len(stuck))
+        solver.stats.count('lockstep_cells', batch.rule_cells)
+
+        for k in stuck:
+            if seed is not None:
+                start_game(start + int(k))
+            else:
+                scalar.generate_minefield(layouts[k])
+                solver.reset()
+            batch.replay(k, scalar)
+            stats.add_game(solver, solver.play())
+    stats.solver_stats = solver.stats
+    if solver.pattern_cache is not None:
+        stats.pattern_hits = solver.pattern_cache.hits
+        stats.pattern_misses = solver.pattern_cache.misses
+    return stats
@@ -0,0 +1,279 @@
+"""Micro-benchmarks of the engine and solver hot paths on seeded boards.
+
+Usage: python benchmark.py [--filter dig] [--save out.json]
+                           [--compare baseline.json] [--replay games.bin]
+"""
+import json
+import tracemalloc
+from argparse import ArgumentParser
+from io import BytesIO
+from itertools import chain
+from time import perf_counter
+
+from common import Result, Content
+from engines import ENGINES, create_engine
+from frontier import get_constraints, get_components
+from game_engine import GameEngine
+from list2d import View2D
+from recording import replay
+from solver import MinesweeperSolver
+
+BOARDS = {
+    'beginner': 0,
+    'intermediate': 1,
+    'expert': 2,
+    # expert density: sparser boards are mostly won by the simple rules
+    # from the first cascade, leaving no position for the solver benchmarks
+    'huge': (100, 100, 2060),
+}
+SEEDS = range(5)
+
+
+def _new_game(engine, seed):
+    engine.rng.seed(seed)
+    engine.generate_minefield()
+
+
+_probed_cells = {}
+
+
+def _probe_cells(engine, seed, probes=64):
+    """Returns a safe cell which reveals only itself and the cell which
+    reveals the largest cascade among cells spread over the seeded board"""
+    key = type(engine), engine.rows, engine.cols, engine.mine_count, seed
+    if key in _probed_cells:
+        return _probed_cells[key]
+    single = cascade = None
+    cascade_size = 0
+    cells = list(engine.all_indices())
+    for r, c in cells[::max(1, len(cells) // probes)]:
+        _new_game(engine, seed)
+        if engine.dig(r, c) != Result.OK:
+            continue
+        if engine.revealed_count == 1:
+            single = single or (r, c)
+        elif engine.revealed_count > cascade_size:
+            cascade, cascade_size = (r, c), engine.revealed_count
+    result = _probed_cells[key] = single or cascade, cascade or single
+    return result
+
+
+class SolverState:
+    """ A seeded game played with certain moves only, up to the point where
+    the simple rules are stuck and a cell waits for model enumeration"""
+
+    def __init__(self, game, seed):
+        self.engine = GameEngine(game)
+        self.solver = MinesweeperSolver(self.engine, report=False,
+                                        global_enumeration=False,
+                                        pattern_cache_size=0)
+        self.position = None
+        cascade = _probe_cells(self.engine, seed)[1]
+        _new_game(self.engine, seed)
+        if cascade is None or self.engine.dig(*cascade) != Result.OK:
+            return
+        while (self.solver._explore_queue and self.solver._simple_explore()
+               and self.engine.result == Result.OK):
+            pass
+        minefield = self.engine.minefield
+        for position in self.solver._enum_queue:
+            if any(minefield[position_i] == Content.Unknown
+                   for position_i in minefield.positions_around(position)):
+                self.position = position
+                break
+        if self.position is None:
+            return
+
+        self.view = View2D(minefield,
+                           minefield.apply_bounds(self.position - (2, 2)),
+                           minefield.apply_bounds(self.position + (3, 3)))
+
+
+def _cycle(items):
+    """Repeats items forever, or stops at once if there are none so that
+    the benchmark using them is skipped"""
+    items = list(items)
+    while items:
+        yield from items
+
+
+def bench_generate_minefield(game, engine_name):
+    engine = create_engine(game, engine_name)
+    seeds = _cycle(SEEDS)
+    return (engine.generate_minefield,
+            lambda: engine.rng.seed(next(seeds)) or ())
+
+
+def _bench_dig(game, engine_name, which):
+    engine = create_engine(game, engine_name)
+    cells = [(seed, _probe_cells(engine, seed)[which]) for seed in SEEDS]
+    cells = _cycle([(seed, cell) for seed, cell in cells if cell])
+
+    def setup():
+        seed, cell = next(cells)
+        _new_game(engine, seed)
+        return cell
+    return engine.dig, setup
+
+
+def bench_dig_single(game, engine_name):
+    return _bench_dig(game, engine_name, 0)
+
+
+def bench_dig_cascade(game, engine_name):
+    return _bench_dig(game, engine_name, 1)
+
+
+def bench_simple_explore(game, engine_name):
+    engine = create_engine(game, engine_name)
+    solver = MinesweeperSolver(engine, report=False)
+    cells = _cycle([(seed, _probe_cells(engine, seed)[1]) for seed in SEEDS])
+
+    def setup():
+        seed, cell = next(cells)
+        _new_game(engine, seed)
+        solver.reset()
+        engine.dig(*cell)
+        return ()
+    return solver._simple_explore, setup
+
+
+def _solver_states(game):
+    states = [SolverState(game, seed) for seed in SEEDS]
+    return [state for state in states if state.position is not None]
+
+
+def bench_get_mines_nonmines(game, engine_name):
+    states = _cycle(_solver_states(game))
+
+    def setup():
+        state = next(states)
+        return state.view, state.position
+    return MinesweeperSolver.get_mines_nonmines, setup
+
+
+def bench_frontier_enumeration(game, engine_name):
+    states = _cycle(_solver_states(game))
+
+    def enumerate_frontier(engine):
+        for component in get_components(get_constraints(engine)):
+            component.enumerate()
+    return enumerate_frontier, lambda: (next(states).engine,)
+
+
+BENCHMARKS = {
+    'generate_minefield': bench_generate_minefield,
+    'dig_single': bench_dig_single,
+    'dig_cascade': bench_dig_cascade,
+    'simple_explore': bench_simple_explore,
+    'get_mines_nonmines': bench_get_mines_nonmines,
+    'frontier_enumeration': bench_frontier_enumeration,
+}
+
+
+def measure(operation, setup, min_time=0.2, max_ops=100000, traced_ops=5):
+    """Returns the operations per second, timing only the operation itself,
+    and the largest peak of memory allocated by a single operation. Slow
+    setups end the timing early once 20 times min_time has passed"""
+    ops = 0
+    elapsed = 0.0
+    deadline = perf_counter() + 20 * min_time
+    while not ops or (elapsed < min_time and ops < max_ops
+                      and perf_counter() < deadline):
+        args = setup()
+        start = perf_counter()
+        operation(*args)
+        elapsed += perf_counter() - start
+        ops += 1
+
+    peak = 0
+    tracemalloc.start()
+    for _ in range(traced_ops):
+        args = setup()
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        operation(*args)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    tracemalloc.stop()
+    return ops / elapsed if elapsed else 0.0, peak
+
+
+def bench_replay(path, engine_name):
+    """Times replaying every game of a recording, one game per operation"""
+    engine_class = type(create_engine(0, engine_name))
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    def replay_all():
+        for _ in replay(BytesIO(data), engine_class):
+            pass
+    ops_per_sec, peak = measure(replay_all, lambda: ())
+    games = sum(1 for _ in replay(BytesIO(data), engine_class))
+    return {'ops_per_sec': ops_per_sec * games, 'peak_bytes': peak}
+
+
+def run(names=None, boards=None, engine_name='list', min_time=0.2):
+    results = {}
+    for name, benchmark in BENCHMARKS.items():
+        if names and not any(part in name for part in names):
+            continue
+        for board, game in BOARDS.items():
+            if boards and board not in boards:
+                continue
+            try:
+                operation, setup = benchmark(game, engine_name)
+                ops_per_sec, peak = measure(operation, setup, min_time)
+            except StopIteration:  # no suitable position in the corpus
+                continue
+            results['{}/{}'.format(name, board)] = {
+                'ops_per_sec': ops_per_sec,
+                'peak_bytes': peak,
+            }
+            yield name, board, results['{}/{}'.format(name, board)]
+
+
+def main(argv=None):
+    parser = ArgumentParser(description='Benchmark engine and solver')
+    parser.add_argument('--filter', nargs='*',
+                        help='run only benchmarks containing these names')
+    parser.add_argument('--boards', nargs='*', choices=list(BOARDS))
+    parser.add_argument('--engine', default='list',
+                        choices=ENGINES)
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='seconds spent timing each benchmark')
+    parser.add_argument('--save', help='write the results to a JSON file')
+    parser.add_argument('--compare', help='baseline JSON file to diff with')
+    parser.add_argument('--replay',
+                        help='also time replaying the games of a recording')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+    results = {}
+    print('{:<22} {:<13} {:>13} {:>11} {:>9}'.format(
+        'benchmark', 'board', 'ops/s', 'peak KiB', 'change'))
+    measured = run(args.filter, args.boards, args.engine, args.min_time)
+    if args.replay:
+        measured = chain(measured, [('replay', 'recording',
+                                     bench_replay(args.replay, args.engine))])
+    for name, board, result in measured:
+        key = '{}/{}'.format(name, board)
+        results[key] = result
+        change = ''
+        if key in baseline and baseline[key]['ops_per_sec']:
+            change = '{:+.1%}'.format(result['ops_per_sec']
+                                      / baseline[key]['ops_per_sec'] - 1)
+        print('{:<22} {:<13} {:>13.1f} {:>11.1f} {:>9}'.format(
+            name, board, result['ops_per_sec'], result['peak_bytes'] / 1024,
+            change))
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+from common import Result, Content
+from game_engine import GameEngine
+from list2d import List2D
+
+# edge masks shared by all boards of the same size, keyed by (rows, cols)
+_board_masks = {}
+
+
+class BoardMasks:
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.full = (1 << rows * cols) - 1
+        first_col = 0
+        for r in range(rows):
+            first_col |= 1 << r * cols
+        self.not_first_col = self.full & ~first_col
+        self.not_last_col = self.full & ~(first_col << cols - 1)
+
+    @classmethod
+    def get(cls, rows, cols):
+        masks = _board_masks.get((rows, cols))
+        if masks is None:
+            masks = _board_masks[rows, cols] = cls(rows, cols)
+        return masks
+
+    def shifts(self, mask):
+        """Returns the 8 copies of mask moved one cell in every direction"""
+        cols = self.cols
+        right = (mask << 1) & self.not_first_col
+        left = (mask >> 1) & self.not_last_col
+        return (
+            right, left,
+            (mask << cols) & self.full, mask >> cols,
+            (right << cols) & self.full, right >> cols,
+            (left << cols) & self.full, left >> cols,
+        )
+
+    def dilate(self, mask):
+        """Returns mask together with every cell adjacent to it"""
+        cols = self.cols
+        row = (mask | ((mask << 1) & self.not_first_col)
+               | ((mask >> 1) & self.not_last_col))
+        return (row | (row << cols) | (row >> cols)) & self.full
+
+
+def _bits(mask):
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class BitboardGameEngine(GameEngine):
+    """ GameEngine which keeps mines, revealed and flagged cells as integer
+    bitmasks with bit r * cols + c for cell (r, c). Neighbour counts are
+    computed with a bit-sliced adder and zero cascades are expanded by
+    dilating the whole region at once. The minefield List2D is still kept
+    up to date for the solver and the UI"""
+
+    def generate_minefield(self, mines=None):
+        if mines is None:
+            mines = self._sample_mines()
+        self.mine_count = len(mines)
+        self._masks = BoardMasks.get(self.rows, self.cols)
+        self._mine_positions = [self._tables.positions[i] for i in mines]
+        self._mine_bits = 0
+        for i in mines:
+            self._mine_bits |= 1 << i
+        self._revealed_bits = 0
+        self._flag_bits = 0
+
+        # bit planes of the neighbour count, added up one direction at a time
+        planes = [0, 0, 0, 0]
+        for shifted in self._masks.shifts(self._mine_bits):
+            carry = shifted
+            for i in range(4):
+                planes[i], carry = planes[i] ^ carry, planes[i] & carry
+                if not carry:
+                    break
+        self._count_planes = planes
+        self._zero_bits = (self._masks.full
+                           & ~self._masks.dilate(self._mine_bits))
+
+        self.minefield = List2D(
+            [Content.Unknown for ci in range(self.cols)]
+            for ri in range(self.rows)
+        )
+        self.flags = 0
+        self.result = Result.OK
+        self._reset_counters()
+        self.new_game_event.notify()
+
+    def _count(self, i):
+        return sum(((plane >> i) & 1) << j
+                   for j, plane in enumerate(self._count_planes))
+
+    def _reveal(self, mask):
+        cols = self.cols
+        for i in _bits(mask):
+            r, c = divmod(i, cols)
+            self._set_content(r, c, Content(self._count(i)))
+            self.update_event.notify(r, c)
+
+    def _dig(self, r, c):
+        if not self.is_unknown(r, c):
+            return Result.OK
+        bit = 1 << r * self.cols + c
+        if self._mine_bits & bit:
+            self._set_content(r, c, Content.BlownMine)
+            self.update_event.notify(r, c)
+            for i in _bits(self._mine_bits & ~self._flag_bits & ~bit):
+                ri, ci = divmod(i, self.cols)
+                self._set_content(ri, ci, Content.Mine)
+                self.update_event.notify(ri, ci)
+            self._notify_cells_update()
+            self.result = Result.Loss
+            self.game_over_event.notify(Result.Loss)
+            return Result.Loss
+
+        closed = self._masks.full & ~self._revealed_bits & ~self._flag_bits
+        region = bit
+        while True:
+            grown = region | (self._masks.dilate(region & self._zero_bits)
+                              & closed)
+            if grown == region:
+                break
+            region = grown
+        self._revealed_bits |= region
+        self._reveal(region)
+        self._notify_cells_update()
+
+        self.result = Result.Win if self._is_win() else Result.OK
+        if self.result != Result.OK:
+            self.game_over_event.notify(self.result)
+        return self.result
+
+    def _is_win(self):
+        return self._revealed_bits | self._mine_bits == self._masks.full
+
+    def toggle_flag(self, r, c):
+        super().toggle_flag(r, c)
+        self._update_flag_bit(r, c)
+
+    def set_flag(self, r, c, content):
+        super().set_flag(r, c, content)
+        self._update_flag_bit(r, c)
+
+    def _update_flag_bit(self, r, c):
+        bit = 1 << r * self.cols + c
+        if self.minefield[r][c] == Content.Flag:
+            self._flag_bits |= bit
+        else:
+            self._flag_bits &= ~bit
@@ -0,0 +1,166 @@
+import cairo
+import gi
+
+from common import Content
+from game_engine import GameEngine
+from solver import MinesweeperSolver
+
+gi.require_version('Gtk', '3.0')
+
+from gi.repository import Gtk, Gdk
+
+CELL_SIZE = 24
+
+_NUMBER_COLOURS = {
+    1: (0.0, 0.0, 0.8),
+    2: (0.0, 0.5, 0.0),
+    3: (0.8, 0.0, 0.0),
+    4: (0.0, 0.0, 0.4),
+    5: (0.5, 0.0, 0.0),
+    6: (0.0, 0.5, 0.5),
+    7: (0.0, 0.0, 0.0),
+    8: (0.4, 0.4, 0.4),
+}
+
+
+class CanvasGrid(Gtk.DrawingArea):
+    """ Board drawn on a single DrawingArea, a drop-in for MinesGrid on
+    large boards. Changed cells are only marked dirty, their areas are
+    invalidated once per frame and the draw handler paints the cells inside
+    the clip. Clicks are mapped to cells by dividing by CELL_SIZE"""
+
+    def __init__(self, game=None, board_pool=None, engine=None,
+                 **properties):
+        Gtk.DrawingArea.__init__(self, **properties)
+        self.engine = engine if engine is not None else GameEngine(game)
+        # no-guess boards are taken from this no_guess.BoardPool if given
+        self.board_pool = board_pool
+        self.engine.cells_update_event.add(self._on_cells_update)
+        self.engine.game_over_event.add(self._on_game_over)
+        self.game_in_progress = True
+        self.solver = MinesweeperSolver(self.engine)
+        # cells changed since the last frame
+        self._dirty = set()
+        self._tick_id = None
+
+        self.set_size_request(self.engine.cols * CELL_SIZE,
+                              self.engine.rows * CELL_SIZE)
+        self.add_events(Gdk.EventMask.BUTTON_PRESS_MASK
+                        | Gdk.EventMask.BUTTON_RELEASE_MASK)
+        self.connect('draw', self._on_draw)
+        self.connect('button-press-event', self._on_button_press_event)
+        self.connect('button-release-event', self._on_button_release_event)
+        if board_pool is not None:
+            self.new_game()
+
+    def new_game(self):
+        self.game_in_progress = True
+        first = None
+        if self.board_pool is not None:
+            mines, first = self.board_pool.get()
+            self.engine.generate_minefield(mines)
+        else:
+            self.engine.generate_minefield()
+        self.solver.reset()
+        self._dirty.clear()
+        self.queue_draw()
+        if first is not None:
+            # no-guess boards are only guaranteed from their first click
+            self.engine.dig(*first)
+
+    def end_game(self):
+        if self.game_in_progress:
+            self.game_in_progress = False
+            self.queue_draw()
+
+    def _on_cells_update(self, cells):
+        self._dirty.update(cells)
+        if self._tick_id is None:
+            self._tick_id = self.add_tick_callback(self._on_tick)
+
+    def _on_tick(self, widget, frame_clock):
+        self._tick_id = None
+        width = self.get_allocated_width()
+        height = self.get_allocated_height()
+        if len(self._dirty) * CELL_SIZE * CELL_SIZE >= width * height // 4:
+            self.queue_draw()
+        else:
+            for r, c in self._dirty:
+                self.queue_draw_area(c * CELL_SIZE, r * CELL_SIZE,
+                                     CELL_SIZE, CELL_SIZE)
+        self._dirty.clear()
+        return False
+
+    def _on_draw(self, widget, cr):
+        x1, y1, x2, y2 = cr.clip_extents()
+        r_start = max(0, int(y1) // CELL_SIZE)
+        r_end = min(self.engine.rows, -(-int(y2) // CELL_SIZE))
+        c_start = max(0, int(x1) // CELL_SIZE)
+        c_end = min(self.engine.cols, -(-int(x2) // CELL_SIZE))
+        cr.select_font_face('Sans', cairo.FONT_SLANT_NORMAL,
+                            cairo.FONT_WEIGHT_BOLD)
+        cr.set_font_size(CELL_SIZE * 0.6)
+        cr.set_line_width(1)
+        for r in range(r_start, r_end):
+            for c in range(c_start, c_end):
+                self._draw_cell(cr, r, c)
+        return True
+
+    def _draw_cell(self, cr, r, c):
+        value = self.engine.minefield[r][c]
+        x = c * CELL_SIZE
+        y = r * CELL_SIZE
+        if value == Content.BlownMine:
+            cr.set_source_rgb(0.9, 0.2, 0.2)
+        elif self.engine.is_unknown(r, c) or value == Content.Flag:
+            shade = 0.7 if self.game_in_progress else 0.6
+            cr.set_source_rgb(shade, shade, shade)
+        else:
+            cr.set_source_rgb(0.9, 0.9, 0.9)
+        cr.rectangle(x, y, CELL_SIZE, CELL_SIZE)
+        cr.fill_preserve()
+        cr.set_source_rgb(0.5, 0.5, 0.5)
+        cr.stroke()
+
+        if value == Content.Mine or value == Content.BlownMine:
+            text, colour = '*', (0.0, 0.0, 0.0)
+        elif value > Content.NoMine:
+            text, colour = str(int(value)), _NUMBER_COLOURS[int(value)]
+        elif value == Content.Flag:
+            text, colour = 'F', (0.8, 0.0, 0.0)
+        elif value == Content.QuestionMark:
+            text, colour = '?', (0.0, 0.0, 0.0)
+        else:
+            return
+        extents = cr.text_extents(text)
+        cr.set_source_rgb(*colour)
+        cr.move_to(x + (CELL_SIZE - extents.width) / 2 - extents.x_bearing,
+                   y + (CELL_SIZE - extents.height) / 2 - extents.y_bearing)
+        cr.show_text(text)
+
+    def _get_cell(self, event_button):
+        r = int(event_button.y) // CELL_SIZE
+        c = int(event_button.x) // CELL_SIZE
+        if 0 <= r < self.engine.rows and 0 <= c < self.engine.cols:
+            return r, c
+        return None
+
+    def _on_button_release_event(self, widget, event_button):
+        position = self._get_cell(event_button)
+        if not self.game_in_progress or position is None:
+            return
+        if event_button.button == 1:
+            self.engine.dig(*position)
+        elif event_button.button == 3:
+            self.engine.toggle_flag(*position)
+
+    def _on_button_press_event(self, widget, event_button: Gdk.EventButton):
+        position = self._get_cell(event_button)
+        if not self.game_in_progress or position is None:
+            return
+        if (event_button.button == 1 and
+                event_button.type == Gdk.EventType.DOUBLE_BUTTON_PRESS):
+            self.engine.chord(*position)
+
+    def _on_game_over(self, result):
+        self.end_game()
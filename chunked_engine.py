@@ -0,0 +1,277 @@
+from array import array
+
+from common import Result, Content, CONTENTS
+from game_engine import GameEngine
+from list2d import List2D
+from position import Position
+
+# chunks are CHUNK x CHUNK cells, addressed by the high bits of the row and
+# column while the low bits give the cell inside the chunk
+CHUNK_BITS = 6
+CHUNK = 1 << CHUNK_BITS
+_MASK = CHUNK - 1
+
+
+class _Chunk:
+    """ Per cell state of one chunk, indexed by (r & _MASK) << CHUNK_BITS |
+    (c & _MASK). mines holds the number of mines around a cell or -10 for a
+    mine, like GameEngine._mines"""
+    __slots__ = ('content', 'mines', 'flags_around', 'unknowns_around')
+
+    def __init__(self, mines, unknowns_around):
+        self.content = array('b', [Content.Unknown]) * (CHUNK * CHUNK)
+        self.mines = mines
+        self.flags_around = bytearray(CHUNK * CHUNK)
+        self.unknowns_around = unknowns_around
+
+
+class ChunkedGrid:
+    """ Exposes the chunks of a ChunkedGameEngine through the List2D
+    interface. Reading a cell whose chunk was never touched returns Unknown
+    without allocating the chunk"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def __getitem__(self, item):
+        if isinstance(item, int):
+            return _Row(self.engine, item)
+        return CONTENTS[self.engine._content(item[0], item[1])]
+
+    def __setitem__(self, key, value):
+        r, c = key
+        self.engine._chunk(r, c).content[_local(r, c)] = value
+
+    def __len__(self):
+        return self.engine.rows
+
+    def size(self):
+        return Position(self.engine.rows, self.engine.cols)
+
+    def range(self, begin, end):
+        return Position.range(self.apply_bounds(begin),
+                              self.apply_bounds(end))
+
+    def positions_around(self, position):
+        return self.engine.cells_around(position[0], position[1])
+
+    apply_bounds = List2D.apply_bounds
+    contents_around = List2D.contents_around
+
+
+class _Row:
+    __slots__ = ('engine', 'r')
+
+    def __init__(self, engine, r):
+        self.engine = engine
+        self.r = r
+
+    def __getitem__(self, c):
+        return self.engine._content(self.r, c)
+
+    def __setitem__(self, c, value):
+        self.engine._chunk(self.r, c).content[_local(self.r, c)] = value
+
+    def __len__(self):
+        return self.engine.cols
+
+    def __iter__(self):
+        return (self.engine._content(self.r, c)
+                for c in range(self.engine.cols))
+
+
+def _local(r, c):
+    return (r & _MASK) << CHUNK_BITS | (c & _MASK)
+
+
+class ChunkedGameEngine(GameEngine):
+    """ GameEngine for huge boards (10^6 cells and more). Mines are kept as
+    per chunk lists of cell offsets while the contents, mine counts and
+    running counters of a chunk are only allocated the first time one of
+    its cells is written, so memory grows with the revealed area instead of
+    the board. No per board lookup tables are built, positions are created
+    on demand"""
+
+    def _init_tables(self):
+        self._tables = None
+        self._positions = None
+        self._chunk_cols = (self.cols + _MASK) >> CHUNK_BITS
+        self._chunks = {}
+        self._chunk_mines = {}
+
+    def _key(self, r, c):
+        return (r >> CHUNK_BITS) * self._chunk_cols + (c >> CHUNK_BITS)
+
+    def _chunk(self, r, c):
+        key = self._key(r, c)
+        chunk = self._chunks.get(key)
+        if chunk is None:
+            chunk = self._chunks[key] = self._new_chunk(
+                r >> CHUNK_BITS, c >> CHUNK_BITS)
+        return chunk
+
+    def _new_chunk(self, kr, kc):
+        r0 = kr << CHUNK_BITS
+        c0 = kc << CHUNK_BITS
+        mines = array('b', bytes(CHUNK * CHUNK))
+        own = ()
+        for kri in range(kr - 1, kr + 2):
+            for kci in range(kc - 1, kc + 2):
+                if not 0 <= kci < self._chunk_cols:
+                    continue
+                offsets = self._chunk_mines.get(kri * self._chunk_cols + kci,
+                                                ())
+                if kri == kr and kci == kc:
+                    own = offsets
+                for offset in offsets:
+                    r = (kri << CHUNK_BITS) + (offset >> CHUNK_BITS)
+                    c = (kci << CHUNK_BITS) + (offset & _MASK)
+                    for ri in range(max(r0, r - 1), min(r0 + CHUNK, r + 2)):
+                        for ci in range(max(c0, c - 1),
+                                        min(c0 + CHUNK, c + 2)):
+                            mines[(ri - r0) << CHUNK_BITS | (ci - c0)] += 1
+        for offset in own:
+            mines[offset] = -10
+
+        if (r0 and c0 and r0 + CHUNK < self.rows
+                and c0 + CHUNK < self.cols):
+            unknowns_around = bytearray([8]) * (CHUNK * CHUNK)
+        else:
+            # chunks on the edge of the board have cells with fewer
+            # neighbours
+            unknowns_around = bytearray(CHUNK * CHUNK)
+            for ri in range(r0, min(r0 + CHUNK, self.rows)):
+                count_r = min(self.rows, ri + 2) - max(0, ri - 1)
+                for ci in range(c0, min(c0 + CHUNK, self.cols)):
+                    count_c = min(self.cols, ci + 2) - max(0, ci - 1)
+                    unknowns_around[(ri - r0) << CHUNK_BITS
+                                    | (ci - c0)] = count_r * count_c - 1
+        return _Chunk(mines, unknowns_around)
+
+    def _content(self, r, c):
+        chunk = self._chunks.get(self._key(r, c))
+        if chunk is None:
+            return Content.Unknown
+        return chunk.content[_local(r, c)]
+
+    def flags_around(self, r, c):
+        chunk = self._chunks.get(self._key(r, c))
+        return chunk.flags_around[_local(r, c)] if chunk is not None else 0
+
+    def unknowns_around(self, r, c):
+        chunk = self._chunks.get(self._key(r, c))
+        if chunk is None:
+            return len(self.cells_around(r, c))
+        return chunk.unknowns_around[_local(r, c)]
+
+    def _reset_counters(self):
+        self._revealed_count = 0
+        self._unknown_count = self.rows * self.cols
+        self._chunks = {}
+
+    def _set_content(self, r, c, content):
+        chunk = self._chunk(r, c)
+        i = _local(r, c)
+        old = chunk.content[i]
+        chunk.content[i] = content
+        self._changed_cells.append(Position(r, c))
+        was_unknown = old == Content.Unknown or old == Content.QuestionMark
+        is_unknown = (content == Content.Unknown
+                      or content == Content.QuestionMark)
+        flag_change = (content == Content.Flag) - (old == Content.Flag)
+        if content >= Content.NoMine > old:
+            self._revealed_count += 1
+        if was_unknown == is_unknown and not flag_change:
+            return
+        unknown_change = is_unknown - was_unknown
+        self._unknown_count += unknown_change
+        for ri, ci in self._around(r, c):
+            chunk_i = self._chunk(ri, ci)
+            j = _local(ri, ci)
+            chunk_i.unknowns_around[j] += unknown_change
+            chunk_i.flags_around[j] += flag_change
+        if flag_change:
+            self.flags += flag_change
+
+    def mine_indices(self):
+        return sorted(
+            ((key // self._chunk_cols << CHUNK_BITS)
+             + (offset >> CHUNK_BITS)) * self.cols
+            + (key % self._chunk_cols << CHUNK_BITS) + (offset & _MASK)
+            for key, offsets in self._chunk_mines.items()
+            for offset in offsets
+        )
+
+    def generate_minefield(self, mines=None):
+        if mines is None:
+            mines = self._sample_mines()
+        self.mine_count = len(mines)
+        self._chunk_mines = {}
+        for i in mines:
+            r, c = divmod(i, self.cols)
+            offsets = self._chunk_mines.get(self._key(r, c))
+            if offsets is None:
+                offsets = self._chunk_mines[self._key(r, c)] = array('H')
+            offsets.append(_local(r, c))
+        self.minefield = ChunkedGrid(self)
+        self.flags = 0
+        self.result = Result.OK
+        self._reset_counters()
+        self.new_game_event.notify()
+
+    def _dig(self, r, c):
+        if not self.is_unknown(r, c):
+            return Result.OK
+        if self._chunk(r, c).mines[_local(r, c)] < 0:
+            self._set_content(r, c, Content.BlownMine)
+            self.update_event.notify(r, c)
+            # only the mines of touched chunks are shown, revealing all of
+            # them would allocate the whole board
+            for key, chunk in list(self._chunks.items()):
+                r0 = key // self._chunk_cols << CHUNK_BITS
+                c0 = key % self._chunk_cols << CHUNK_BITS
+                for offset in self._chunk_mines.get(key, ()):
+                    if chunk.content[offset] == Content.Unknown or \
+                            chunk.content[offset] == Content.QuestionMark:
+                        ri = r0 + (offset >> CHUNK_BITS)
+                        ci = c0 + (offset & _MASK)
+                        self._set_content(ri, ci, Content.Mine)
+                        self.update_event.notify(ri, ci)
+            self._notify_cells_update()
+            self.result = Result.Loss
+            self.game_over_event.notify(Result.Loss)
+            return Result.Loss
+
+        explore_stack = [(r, c)]
+        while explore_stack:
+            r, c = explore_stack.pop()
+            if not self.is_unknown(r, c):
+                continue
+            count = self._chunk(r, c).mines[_local(r, c)]
+            if count == 0:
+                explore_stack.extend(self._around(r, c))
+            self._set_content(r, c, Content(count) if count >= 0
+                              else Content.NoMine)
+            self.update_event.notify(r, c)
+        self._notify_cells_update()
+
+        self.result = Result.Win if self._is_win() else Result.OK
+        if self.result != Result.OK:
+            self.game_over_event.notify(self.result)
+        return self.result
+
+    def _around(self, r, c):
+        return [(ri, ci)
+                for ri in range(max(0, r - 1), min(self.rows, r + 2))
+                for ci in range(max(0, c - 1), min(self.cols, c + 2))
+                if ri != r or ci != c]
+
+    def all_indices(self):
+        return Position.range((self.rows, self.cols))
+
+    def cells_around(self, r, c):
+        return tuple(Position(ri, ci) for ri, ci in self._around(r, c))
+
+    def is_unknown(self, r, c):
+        value = self._content(r, c)
+        return value == Content.Unknown or value == Content.QuestionMark
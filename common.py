@@ -1,5 +1,7 @@
 from collections import OrderedDict
 from enum import Enum, IntEnum
+from heapq import heappush, heappop
+from itertools import count
 from types import FunctionType, MethodType
 
 
@@ -28,12 +30,23 @@ class GameError(Exception):
     pass
 
 
+# directory of the no-guess board pool files
+POOL_DIR = 'boards'
+
+
 class Result(Enum):
     OK = 0
     Win = 1
     Loss = 2
 
 
+class Action(IntEnum):
+    Dig = 0
+    ToggleFlag = 1
+    SetFlag = 2
+    Chord = 3
+
+
 class Content(IntEnum):
     BlownMine = -5
     Mine = -4
@@ -62,33 +75,83 @@ class Content(IntEnum):
                 and self != Content.QuestionMark)
 
 
-class UniqueStack:
+# Content members by value, a dict lookup is faster than Content(value)
+CONTENTS = {content.value: content for content in Content}
+
+
+class UniquePriorityQueue:
     """
-    Stack which maintains uniqueness property by taking the items that are
-    reinserted and moving them to the top
+    Priority queue of unique items which pops the lowest priority first and
+    the most recently pushed item among equal priorities. Pushing an item
+    again updates its priority, the outdated heap entry is skipped lazily
+    when it comes up. Pushing an item again at the priority it already has
+    changes nothing, it keeps its place among its equals
     """
 
     def __init__(self):
-        self.store = OrderedDict()
+        self.heap = []
+        self.priorities = {}
+        self._counter = count()
 
     def __len__(self):
-        return len(self.store)
+        return len(self.priorities)
 
-    def push(self, elem):
-        if elem in self.store:
-            self.store.move_to_end(elem)
-        else:
-            self.store[elem] = None
+    def __iter__(self):
+        return iter(self.priorities)
 
-    def push_all(self, other):
-        for elem in other:
-            self.push(elem)
-        return self
+    def push(self, elem, priority=0):
+        if self.priorities.get(elem) == priority:
+            return
+        self.priorities[elem] = priority
+        heappush(self.heap, (priority, -next(self._counter), elem))
 
     def pop(self):
-        return self.store.popitem()[0]
+        while True:
+            priority, _, elem = heappop(self.heap)
+            if self.priorities.get(elem) == priority:
+                del self.priorities[elem]
+                return elem
+
+    def discard(self, elem):
+        self.priorities.pop(elem, None)
 
     def clear(self):
-        self.store.clear()
+        self.heap.clear()
+        self.priorities.clear()
+
 
+class LRUCache:
+    """
+    Bounded mapping which evicts the least recently used item when full and
+    counts lookup hits and misses
+    """
+
+    def __init__(self, maxsize):
+        self.store = OrderedDict()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
 
+    def __len__(self):
+        return len(self.store)
+
+    def get(self, key):
+        try:
+            value = self.store[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.store.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.store[key] = value
+        self.store.move_to_end(key)
+        if len(self.store) > self.maxsize:
+            self.store.popitem(last=False)
+
+    def clear(self):
+        self.store.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,81 @@
+from math import gcd
+
+
+def _reduce(coefficients, value):
+    """Divides a row by the gcd of its coefficients and value"""
+    divisor = abs(value)
+    for coefficient in coefficients.values():
+        divisor = gcd(divisor, coefficient)
+    if divisor > 1:
+        coefficients = {i: coefficient // divisor
+                        for i, coefficient in coefficients.items()}
+        value //= divisor
+    return coefficients, value
+
+
+def _subtract(row, pivot, i):
+    """Eliminates cell i from row using the pivot row, keeping integer
+    coefficients"""
+    coefficients, value = row
+    pivot_coefficients, pivot_value = pivot
+    a = pivot_coefficients[i]
+    b = coefficients[i]
+    result = {j: a * coefficient for j, coefficient in coefficients.items()}
+    for j, coefficient in pivot_coefficients.items():
+        result[j] = result.get(j, 0) - b * coefficient
+    result = {j: coefficient for j, coefficient in result.items()
+              if coefficient}
+    return _reduce(result, a * value - b * pivot_value)
+
+
+def forced_cells(component):
+    """Row reduces the constraints of a component, each one a sum of 0/1
+    cells equal to a mine count, and returns the cells that are mines and
+    the cells that are safe because a row can only be met at the bound of
+    its coefficients. Forced cells are substituted back until no row
+    forces anything more"""
+    rows = [(dict.fromkeys(indices, 1), mines)
+            for mines, indices in component.constraints]
+    reduced = []
+    for i in range(len(component)):
+        pivot = next((row for row in rows if i in row[0]), None)
+        if pivot is None:
+            continue
+        rows.remove(pivot)
+        rows = [_subtract(row, pivot, i) if i in row[0] else row
+                for row in rows]
+        reduced = [_subtract(row, pivot, i) if i in row[0] else row
+                   for row in reduced]
+        reduced.append(pivot)
+    # the original rows are kept as well, the reduced ones do not imply
+    # their bounds
+    rows = reduced + [(dict.fromkeys(indices, 1), mines)
+                      for mines, indices in component.constraints]
+
+    values = {}
+    changed = True
+    while changed:
+        changed = False
+        for coefficients, value in rows:
+            for i, coefficient in coefficients.items():
+                if i in values:
+                    value -= coefficient * values[i]
+            free = [(i, coefficient) for i, coefficient
+                    in coefficients.items() if i not in values]
+            if not free:
+                continue
+            low = sum(coefficient for i, coefficient in free
+                      if coefficient < 0)
+            high = sum(coefficient for i, coefficient in free
+                       if coefficient > 0)
+            if value == low:
+                values.update((i, int(coefficient < 0))
+                              for i, coefficient in free)
+                changed = True
+            elif value == high:
+                values.update((i, int(coefficient > 0))
+                              for i, coefficient in free)
+                changed = True
+    return ([component.cells[i] for i, value in values.items() if value],
+            [component.cells[i] for i, value in values.items()
+             if not value])
@@ -0,0 +1,17 @@
+from game_engine import GameEngine
+
+# names of the game engines create_engine builds
+ENGINES = ('list', 'array', 'bitboard', 'chunked')
+
+
+def create_engine(game, engine='list'):
+    if engine == 'array':
+        from array_engine import ArrayGameEngine
+        return ArrayGameEngine(game)
+    if engine == 'bitboard':
+        from bitboard_engine import BitboardGameEngine
+        return BitboardGameEngine(game)
+    if engine == 'chunked':
+        from chunked_engine import ChunkedGameEngine
+        return ChunkedGameEngine(game)
+    return GameEngine(game)
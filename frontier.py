@@ -0,0 +1,383 @@
+from time import perf_counter
+
+from common import Content
+
+
+class EnumerationLimit(Exception):
+    pass
+
+
+class Component:
+    """ Independent part of the frontier: a set of unknown cells and the
+    number constraints that only involve those cells. Cells are stored as
+    (row, col) tuples and constraints as (mines, cell indices) pairs"""
+
+    def __init__(self, cells, constraints):
+        self.cells = cells
+        self.constraints = constraints
+        # maps a mine total to [solution count, mine count of every cell]
+        self.solutions = None
+        # search nodes visited by the last enumeration
+        self.nodes = 0
+
+    def __len__(self):
+        return len(self.cells)
+
+    def enumerate(self, max_nodes=200000, deadline=None):
+        """Counts all consistent assignments of the component's cells by
+        backtracking. Returns False if the search exceeded max_nodes or ran
+        past the perf_counter deadline"""
+        cell_count = len(self.cells)
+        needed = [mines for mines, indices in self.constraints]
+        unassigned = [len(indices) for mines, indices in self.constraints]
+        cell_constraints = [[] for _ in range(cell_count)]
+        for k, (mines, indices) in enumerate(self.constraints):
+            for i in indices:
+                cell_constraints[i].append(k)
+        assignment = [0] * cell_count
+        solutions = {}
+        # value tried at each depth, -1 before the first one; the search
+        # keeps its own stack so that long components cannot exceed the
+        # recursion limit
+        tried = [-1] * cell_count
+        nodes = max_nodes
+
+        try:
+            i = 0
+            mine_total = 0
+            while i >= 0:
+                if i == cell_count:
+                    solution = solutions.get(mine_total)
+                    if solution is None:
+                        solution = solutions[mine_total] = [
+                            0, [0] * cell_count]
+                    solution[0] += 1
+                    totals = solution[1]
+                    for j in range(cell_count):
+                        totals[j] += assignment[j]
+                    i -= 1
+                    continue
+                constraints_i = cell_constraints[i]
+                value = tried[i]
+                if value < 0:
+                    nodes -= 1
+                    if not nodes:
+                        raise EnumerationLimit
+                    if (deadline is not None and not nodes & 4095
+                            and perf_counter() > deadline):
+                        raise EnumerationLimit
+                else:
+                    for k in constraints_i:
+                        unassigned[k] += 1
+                        needed[k] += value
+                    mine_total -= value
+                value += 1
+                if value == 2:
+                    tried[i] = -1
+                    assignment[i] = 0
+                    i -= 1
+                    continue
+                tried[i] = value
+                valid = True
+                for k in constraints_i:
+                    unassigned[k] -= 1
+                    needed[k] -= value
+                    if needed[k] < 0 or needed[k] > unassigned[k]:
+                        valid = False
+                assignment[i] = value
+                mine_total += value
+                if valid:
+                    i += 1
+        except EnumerationLimit:
+            return False
+        finally:
+            self.nodes = max_nodes - nodes
+        self.solutions = solutions
+        return True
+
+    def certain_cells(self):
+        """Returns the cells which are mines in every solution and the cells
+        which are mines in none"""
+        if not self.solutions:
+            return [], []
+        count = sum(solution[0] for solution in self.solutions.values())
+        totals = [0] * len(self.cells)
+        for solution_count, cell_totals in self.solutions.values():
+            for i, total in enumerate(cell_totals):
+                totals[i] += total
+        return (
+            [cell for cell, total in zip(self.cells, totals)
+             if total == count],
+            [cell for cell, total in zip(self.cells, totals) if total == 0]
+        )
+
+
+# components smaller than this are enumerated in the calling process even
+# when an executor is given, shipping them costs more than solving them
+PARALLEL_MIN_CELLS = 16
+
+
+def _enumerate_task(component):
+    component.enumerate()
+    return component.solutions, component.nodes
+
+
+def enumerate_components(components, executor=None):
+    """Enumerates every component, the larger ones through executor.map if
+    one is given so that they run concurrently in a thread or process pool.
+    Components only touch their own state, the results are copied back.
+    Returns whether each enumeration completed"""
+    if executor is not None:
+        large = [component for component in components
+                 if len(component) >= PARALLEL_MIN_CELLS]
+        if len(large) > 1:
+            for component, (solutions, nodes) in zip(
+                    large, executor.map(_enumerate_task, large)):
+                component.solutions = solutions
+                component.nodes = nodes
+            return [component.enumerate()
+                    if len(component) < PARALLEL_MIN_CELLS
+                    else component.solutions is not None
+                    for component in components]
+    return [component.enumerate() for component in components]
+
+
+def get_constraints(engine, cells=None):
+    """Returns (mines, unknown cells) for every number cell which borders
+    unknown cells, looking at the given cells or the whole board"""
+    minefield = engine.minefield
+    if cells is None:
+        cells = engine.all_indices()
+    constraints = []
+    for r, c in cells:
+        value = minefield[r][c]
+        if value <= Content.NoMine:
+            continue
+        unknowns = []
+        flags = 0
+        for ri, ci in engine.cells_around(r, c):
+            if engine.is_unknown(ri, ci):
+                unknowns.append((ri, ci))
+            elif minefield[ri][ci] == Content.Flag:
+                flags += 1
+        if unknowns:
+            constraints.append((value - flags, unknowns))
+    return constraints
+
+
+class FrontierIndex:
+    """ Live index of the frontier, kept up to date from the cells changed
+    on the engine: the mines still needed and the unknown cells of every
+    revealed number which borders unknown cells, and the numbers
+    constraining each unknown cell. A revealed or flagged cell is removed
+    from the constraints around it, so an update costs a pass over the
+    neighbours of each changed cell"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        # number position -> [mines, set of unknown cells]
+        self.constraints = {}
+        # unknown cell -> set of number positions constraining it
+        self.cell_constraints = {}
+
+    def clear(self):
+        self.constraints.clear()
+        self.cell_constraints.clear()
+
+    def update(self, cells):
+        """Applies the changed cells, returns the number positions whose
+        constraints changed"""
+        engine = self.engine
+        minefield = engine.minefield
+        changed = set()
+        for r, c in cells:
+            cell = r, c
+            value = minefield[r][c]
+            if value == Content.Unknown or value == Content.QuestionMark:
+                # a flag was taken back, the numbers around it are rebuilt
+                for position in engine.cells_around(r, c):
+                    self._set_constraint(position, changed)
+                continue
+            for position in self.cell_constraints.pop(cell, ()):
+                constraint = self.constraints[position]
+                constraint[1].discard(cell)
+                if value == Content.Flag:
+                    constraint[0] -= 1
+                if not constraint[1]:
+                    del self.constraints[position]
+                changed.add(position)
+            if value > Content.NoMine:
+                self._set_constraint(cell, changed)
+        return changed
+
+    def _set_constraint(self, position, changed):
+        r, c = position
+        position = r, c
+        old = self.constraints.pop(position, None)
+        if old is not None:
+            for cell in old[1]:
+                constraints = self.cell_constraints[cell]
+                constraints.discard(position)
+                if not constraints:
+                    del self.cell_constraints[cell]
+            changed.add(position)
+        engine = self.engine
+        minefield = engine.minefield
+        value = minefield[r][c]
+        if value <= Content.NoMine or not engine.unknowns_around(r, c):
+            return
+        unknowns = set()
+        for ri, ci in engine.cells_around(r, c):
+            value_i = minefield[ri][ci]
+            if value_i == Content.Unknown or value_i == Content.QuestionMark:
+                unknowns.add((ri, ci))
+                self.cell_constraints.setdefault((ri, ci), set()).add(
+                    position)
+        self.constraints[position] = [
+            int(value) - engine.flags_around(r, c), unknowns]
+        changed.add(position)
+
+    def get_constraints(self):
+        """Returns (mines, unknown cells) for every number of the frontier,
+        in the order get_constraints finds them"""
+        return [(mines, sorted(cells)) for position, (mines, cells)
+                in sorted(self.constraints.items())]
+
+
+def get_components(constraints):
+    """Splits the constraints into independent components. Cells of each
+    component are ordered breadth first so that constraints are closed as
+    early as possible during enumeration"""
+    cell_constraints = {}
+    for k, (mines, cells) in enumerate(constraints):
+        for cell in cells:
+            cell_constraints.setdefault(cell, []).append(k)
+
+    components = []
+    visited_cells = set()
+    visited_constraints = set()
+    for start in cell_constraints:
+        if start in visited_cells:
+            continue
+        visited_cells.add(start)
+        cells = [start]
+        component_constraints = []
+        for cell in cells:  # cells grows while iterating: breadth first
+            for k in cell_constraints[cell]:
+                if k in visited_constraints:
+                    continue
+                visited_constraints.add(k)
+                component_constraints.append(k)
+                for cell_j in constraints[k][1]:
+                    if cell_j not in visited_cells:
+                        visited_cells.add(cell_j)
+                        cells.append(cell_j)
+        index = {cell: i for i, cell in enumerate(cells)}
+        components.append(Component(cells, [
+            (int(constraints[k][0]),
+             [index[cell] for cell in constraints[k][1]])
+            for k in component_constraints
+        ]))
+    return components
+
+
+def _convolve(a, b):
+    result = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                result[i + j] += x * y
+    return result
+
+
+def _other_weights(other_count, mines_left, max_frontier_mines):
+    """Returns comb(other_count, mines_left - f) for every frontier mine
+    total f up to max_frontier_mines, all scaled by the same factor. Only
+    the neighbouring ratios comb(n, k + 1) = comb(n, k) * (n - k) / (k + 1)
+    are used, so no binomial of the whole board is ever computed"""
+    weights = [0] * (max_frontier_mines + 1)
+    low = max(0, mines_left - max_frontier_mines)
+    high = min(other_count, mines_left)
+    if low > high:
+        return weights
+    # comb(n, k) / comb(n, low) * (low + 1) * ... * high, an integer
+    weight = 1
+    for k in range(low, high):
+        weight *= k + 1
+    for k in range(low, high + 1):
+        weights[mines_left - k] = weight
+        if k < high:
+            weight = weight // (k + 1) * (other_count - k)
+    return weights
+
+
+def get_weights(components, other_count, mines_left):
+    """Counts the boards consistent with the solutions of each component
+    and mines_left, the remaining mines being placed among the other_count
+    unconstrained cells. Returns a dict of the boards where each frontier
+    cell is a mine, the mines among the unconstrained cells summed over all
+    boards and the board count, or None if there is no such board. All
+    counts are scaled by a common factor, only their ratios are exact"""
+    polynomials = []
+    for component in components:
+        polynomial = [0] * (max(component.solutions) + 1)
+        for mine_total, (count, totals) in component.solutions.items():
+            polynomial[mine_total] = count
+        polynomials.append(polynomial)
+
+    # prefix[i] and suffix[i] are the solution counts by mine total of the
+    # components before i and from i onwards
+    prefix = [[1]]
+    for polynomial in polynomials:
+        prefix.append(_convolve(prefix[-1], polynomial))
+    suffix = [[1]]
+    for polynomial in reversed(polynomials):
+        suffix.append(_convolve(suffix[-1], polynomial))
+    suffix.reverse()
+
+    other_weights = _other_weights(other_count, mines_left,
+                                   len(prefix[-1]) - 1)
+
+    def weight(frontier_mines):
+        return other_weights[frontier_mines]
+
+    total = 0
+    other_mines = 0
+    for frontier_mines, count in enumerate(prefix[-1]):
+        if count:
+            weight_i = count * weight(frontier_mines)
+            total += weight_i
+            other_mines += weight_i * (mines_left - frontier_mines)
+    if not total:
+        return None
+
+    weights = {}
+    for i, component in enumerate(components):
+        rest = _convolve(prefix[i], suffix[i + 1])
+        cell_weights = [0] * len(component)
+        for mine_total, (count, totals) in component.solutions.items():
+            weight_i = sum(rest_count * weight(mine_total + rest_mines)
+                           for rest_mines, rest_count in enumerate(rest)
+                           if rest_count)
+            if weight_i:
+                for j, cell_total in enumerate(totals):
+                    cell_weights[j] += cell_total * weight_i
+        weights.update(zip(component.cells, cell_weights))
+    return weights, other_mines, total
+
+
+def get_probabilities(components, other_count, mines_left):
+    """Computes the exact mine probability of every frontier cell using the
+    solutions of each component, weighted by the number of ways to place the
+    remaining mines among the other_count unconstrained cells. Returns a dict
+    of cell probabilities and the probability of an unconstrained cell, or
+    None if no assignment is consistent with mines_left"""
+    result = get_weights(components, other_count, mines_left)
+    if result is None:
+        return None
+    weights, other_mines, total = result
+    probabilities = {cell: cell_weight / total
+                     for cell, cell_weight in weights.items()}
+    other_probability = (other_mines / (total * other_count)
+                         if other_count else 1.0)
+    return probabilities, other_probability
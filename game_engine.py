@@ -1,29 +1,46 @@
-from random import randrange
+from random import Random
 
-from common import Event, Result, Content
+from common import Event, Result, Content, Action
 from list2d import List2D
-from position import Position
+from position import Position, BoardTables
 
 
 class GameEngine:
-    def __init__(self, game=None):
+    def __init__(self, game=None, rng=None):
+        # seed this to reproduce the boards
+        self.rng = rng if rng is not None else Random()
+        # notified with (r, c) for every changed cell
         self.update_event = Event()
+        # notified once per dig or flag operation with the changed positions
+        self.cells_update_event = Event()
+        self._changed_cells = []
         self.flags_changed_event = Event()
         self.game_over_event = Event()
+        # notified with (action, r, c, content) for every player action
+        self.action_event = Event()
+        # notified once the mines of a new game are placed
+        self.new_game_event = Event()
         self.result = Result.OK
         if isinstance(game, int):
             self.rows, self.cols, self.mine_count = [[8, 8, 10],
                                                      [16, 16, 40],
                                                      [16, 30, 99]][game]
+        elif isinstance(game, (tuple, list)):
+            self.rows, self.cols, self.mine_count = game
         else:
             self.rows, self.cols, self.mine_count = (int(s) for s
                                                      in input().split())
         self.size = Position(self.rows, self.cols)
+        self._init_tables()
         self._flags = 0
         self._mines = List2D()
         self.minefield = List2D()
         self.generate_minefield()
 
+    def _init_tables(self):
+        self._tables = BoardTables.get(self.rows, self.cols)
+        self._positions = self._tables.grid
+
     @property
     def flags(self):
         return self._flags
@@ -33,7 +50,66 @@ class GameEngine:
         self._flags = value
         self.flags_changed_event.notify()
 
-    def generate_minefield(self):
+    @property
+    def revealed_count(self):
+        return self._revealed_count
+
+    @property
+    def unknown_count(self):
+        return self._unknown_count
+
+    def flags_around(self, r, c):
+        return self._flags_around[r * self.cols + c]
+
+    def unknowns_around(self, r, c):
+        return self._unknowns_around[r * self.cols + c]
+
+    def _reset_counters(self):
+        self._revealed_count = 0
+        self._unknown_count = self.rows * self.cols
+        self._flags_around = [0] * (self.rows * self.cols)
+        self._unknowns_around = list(self._tables.neighbour_counts)
+
+    def _set_content(self, r, c, content):
+        """Writes content to the minefield and keeps the running counters
+        in step with the change"""
+        old = int(self.minefield[r][c])
+        self.minefield[r][c] = content
+        self._changed_cells.append(self._positions[r][c])
+        was_unknown = old == Content.Unknown or old == Content.QuestionMark
+        is_unknown = (content == Content.Unknown
+                      or content == Content.QuestionMark)
+        flag_change = (content == Content.Flag) - (old == Content.Flag)
+        if content >= Content.NoMine > old:
+            self._revealed_count += 1
+        if was_unknown == is_unknown and not flag_change:
+            return
+        unknown_change = is_unknown - was_unknown
+        self._unknown_count += unknown_change
+        for i in self._tables.neighbours[r * self.cols + c]:
+            self._unknowns_around[i] += unknown_change
+            self._flags_around[i] += flag_change
+        if flag_change:
+            self.flags += flag_change
+
+    def _notify_cells_update(self):
+        if self._changed_cells:
+            changed_cells, self._changed_cells = self._changed_cells, []
+            self.cells_update_event.notify(changed_cells)
+
+    def _sample_mines(self):
+        return self.rng.sample(range(self.rows * self.cols), self.mine_count)
+
+    def mine_indices(self):
+        """Returns the flat indices (row * cols + col) of the mines"""
+        return sorted(r * self.cols + c for r, c in self._mine_positions)
+
+    def generate_minefield(self, mines=None):
+        """Starts a new game with the mines at the given flat cell indices
+        or, by default, at cells sampled from rng"""
+        if mines is None:
+            mines = self._sample_mines()
+        self.mine_count = len(mines)
         self._mines = List2D(
             [0 for ci in range(self.cols)] for ri in range(self.rows)
         )
@@ -43,43 +119,57 @@ class GameEngine:
         )
         self.flags = 0
         self.result = Result.OK
+        self._reset_counters()
 
-        mi = self.mine_count
-        while mi:
-            ri = randrange(self.rows)
-            ci = randrange(self.cols)
-            if self._mines[ri][ci] >= 0:
-                self._mines[ri][ci] = -10
-                for rj, cj in self.cells_around(ri, ci):
-                    self._mines[rj][cj] += 1
-                mi -= 1  # decrement only when a mine is placed
+        self._mine_positions = [self._tables.positions[i] for i in mines]
+        for ri, ci in self._mine_positions:
+            self._mines[ri][ci] = -10
+            for rj, cj in self.cells_around(ri, ci):
+                self._mines[rj][cj] += 1
+        self.new_game_event.notify()
 
     def dig(self, r, c):
+        self.action_event.notify(Action.Dig, r, c, None)
+        return self._dig(r, c)
+
+    def chord(self, r, c):
+        """Digs around a cell whose number of flags around it is reached"""
+        self.action_event.notify(Action.Chord, r, c, None)
+        if self.minefield[r][c] == self.flags_around(r, c):
+            for ri, ci in self.cells_around(r, c):
+                if self.result != Result.OK:
+                    break
+                self._dig(ri, ci)
+        return self.result
+
+    def _dig(self, r, c):
         if not self.is_unknown(r, c):
             return Result.OK
         if self._mines[r][c] < 0:
-            self.minefield[r][c] = Content.BlownMine
+            self._set_content(r, c, Content.BlownMine)
             self.update_event.notify(r, c)
-            for ri, ci in self.all_indices():
-                if ((ri != r or ci != c) and self._mines[ri][ci] < 0 and
+            for ri, ci in self._mine_positions:
+                if ((ri != r or ci != c) and
                         self.minefield[ri][ci] != Content.Flag):
-                    self.minefield[ri][ci] = Content.Mine
+                    self._set_content(ri, ci, Content.Mine)
                     self.update_event.notify(ri, ci)
+            self._notify_cells_update()
             self.result = Result.Loss
             self.game_over_event.notify(Result.Loss)
             return Result.Loss
 
-        explore_stack = [Position(r, c)]
+        explore_stack = [self._positions[r][c]]
         while explore_stack:
             r, c = explore_stack.pop()
             if not self.is_unknown(r, c):
                 continue
             if self._mines[r][c] == 0:
                 explore_stack.extend(self.cells_around(r, c))
-            self.minefield[r][c] = Content(self._mines[r][c]
-                                           if self._mines[r][c] >= 0
-                                           else Content.NoMine)
+            self._set_content(r, c, Content(self._mines[r][c]
+                                            if self._mines[r][c] >= 0
+                                            else Content.NoMine))
             self.update_event.notify(r, c)
+        self._notify_cells_update()
 
         self.result = Result.Win if self._is_win() else Result.OK
         if self.result != Result.OK:
@@ -87,44 +177,35 @@ class GameEngine:
         return self.result
 
     def _is_win(self):
-        for ri, ci in self.all_indices():
-            if 0 <= self._mines[ri][ci] != self.minefield[ri][ci]:
-                return False
-        return True
+        return self._revealed_count == (self.rows * self.cols
+                                        - self.mine_count)
 
     def toggle_flag(self, r, c):
+        self.action_event.notify(Action.ToggleFlag, r, c, None)
         if self.minefield[r][c] == Content.Unknown:
-            self.minefield[r][c] = Content.Flag
-            self.flags += 1
+            self._set_content(r, c, Content.Flag)
         elif self.minefield[r][c] == Content.Flag:
-            self.minefield[r][c] = Content.QuestionMark
-            self.flags -= 1
+            self._set_content(r, c, Content.QuestionMark)
         elif self.minefield[r][c] == Content.QuestionMark:
-            self.minefield[r][c] = Content.Unknown
+            self._set_content(r, c, Content.Unknown)
         self.update_event.notify(r, c)
+        self._notify_cells_update()
 
     def set_flag(self, r, c, content):
+        self.action_event.notify(Action.SetFlag, r, c, content)
         if (self.minefield[r][c] != content and
                 (self.minefield[r][c] == Content.Flag or self.is_unknown(r, c))
             and (content == Content.Unknown or content == Content.QuestionMark
                  or content == Content.Flag)):
-            self.minefield[r][c] = content
-            if content == Content.Flag:
-                self.flags += 1
-            elif self.minefield[r][c] == Content.Flag:
-                self.flags -= 1
+            self._set_content(r, c, content)
             self.update_event.notify(r, c)
+            self._notify_cells_update()
 
     def all_indices(self):
-        return Position.range(self.size)
+        return iter(self._tables.positions)
 
     def cells_around(self, r, c):
-        return (
-            Position(ri, ci)
-            for ri in range(max(0, r - 1), min(self.rows, r + 2))
-            for ci in range(max(0, c - 1), min(self.cols, c + 2))
-            if ri != r or ci != c
-        )
+        return self._tables.positions_around[r][c]
 
     def is_unknown(self, r, c):
         return (Content.Unknown == self.minefield[r][c] or
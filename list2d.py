@@ -1,4 +1,5 @@
-from position import Position
+from common import CONTENTS
+from position import Position, BoardTables
 
 
 class List2D(list):
@@ -40,24 +41,21 @@ class List2D(list):
         return Position(max(0, min(position[0], size.row)),
                         max(0, min(position[1], size.col)))
 
+    def tables(self):
+        return BoardTables.get(len(self), len(super().__getitem__(0)))
+
     def range(self, begin, end):
+        grid = self.tables().grid
+        begin = self.apply_bounds(begin)
+        end = self.apply_bounds(end)
         return (
-            position
-            for position in Position.range(self.apply_bounds(begin),
-                                           self.apply_bounds(end))
+            grid[ri][ci]
+            for ri in range(begin[0], end[0])
+            for ci in range(begin[1], end[1])
         )
 
     def positions_around(self, position):
-        size = self.size()
-        position = Position.cast(position)
-        return (
-            Position(ri, ci)
-            for ri in range(max(0, position.row - 1),
-                            min(size.row, position.row + 2))
-            for ci in range(max(0, position.col - 1),
-                            min(size.col, position.col + 2))
-            if ri != position.row or ci != position.col
-        )
+        return self.tables().positions_around[position[0]][position[1]]
 
     def contents_around(self, position):
         return (
@@ -90,15 +88,13 @@ class View2D:
             self.__dict__[key] = value
 
     def positions_around(self, position):
-        position = Position.cast(position)
-        return (
-            Position(ri, ci)
-            for ri in range(max(self.lower.row, position.row - 1),
-                            min(self.upper.row, position.row + 2))
-            for ci in range(max(self.lower.col, position.col - 1),
-                            min(self.upper.col, position.col + 2))
-            if ri != position.row or ci != position.col
-        )
+        r, c = position
+        around = self.list2d.positions_around(position)
+        if (self.lower[0] < r < self.upper[0] - 1
+                and self.lower[1] < c < self.upper[1] - 1):
+            return around
+        return tuple(position_i for position_i in around
+                     if position_i.check_bounds(self.lower, self.upper))
 
     def apply_bounds(self, position):
         if Position.check_bounds(position, self.lower, self.upper):
@@ -107,7 +103,43 @@ class View2D:
                         max(self.lower.col, min(position[1], self.upper.col)))
 
     def all_positions(self):
-        return Position.range(self.lower, self.upper)
+        return self.list2d.range(self.lower, self.upper)
+
+    range = List2D.range
+    contents_around = List2D.contents_around
+
+
+class Array2D:
+    """ Exposes a 2D NumPy array through the List2D interface. Cells accessed
+    with a position are returned as Content members, while indexing with a
+    row number returns the raw NumPy row for fast scalar comparisons"""
+    def __init__(self, array):
+        self.array = array
+
+    def __getitem__(self, item):
+        if isinstance(item, (Position, tuple, list)):
+            return CONTENTS[self.array.item(item[0], item[1])]
+        return self.array[item]
+
+    def __setitem__(self, key, value):
+        if isinstance(key, int):
+            self.array[key] = value
+        else:
+            self.array[key[0], key[1]] = value
+
+    def __len__(self):
+        return len(self.array)
+
+    def __iter__(self):
+        return iter(self.array)
+
+    def size(self):
+        return Position(*self.array.shape)
+
+    def tables(self):
+        return BoardTables.get(*self.array.shape)
 
+    apply_bounds = List2D.apply_bounds
     range = List2D.range
+    positions_around = List2D.positions_around
     contents_around = List2D.contents_around
@@ -1,6 +1,10 @@
+import os
+from argparse import ArgumentParser
+
 import gi
 
-from common import Result
+from common import Result, POOL_DIR
+from engines import ENGINES, create_engine
 from mines_grid import MinesGrid
 
 gi.require_version('Gtk', '3.0')
@@ -8,7 +12,7 @@ from gi.repository import Gtk, GLib
 
 
 class MinesweeperUI:
-    def __init__(self):
+    def __init__(self, game=2, canvas=False, engine='list'):
         builder = Gtk.Builder()
         builder.add_from_file('Glade/Minesweeper-main-window.glade')
 
@@ -22,8 +26,23 @@ class MinesweeperUI:
         self.solve_button = builder.get_object('solve_toggle_button')
         self.step_button = builder.get_object('step_button')
 
-        self.mines_grid = MinesGrid(2)
-        self.content_box.pack_end(self.mines_grid, expand=True, fill=True,
+        # no-guess games once the pool was filled by running no_guess.py,
+        # the generator is only imported then
+        board_pool = None
+        if os.path.isdir(POOL_DIR):
+            from no_guess import BoardPool
+            board_pool = BoardPool(POOL_DIR, game)
+        engine = create_engine(game, engine)
+        if canvas:
+            from canvas_grid import CanvasGrid
+            self.mines_grid = CanvasGrid(board_pool=board_pool,
+                                         engine=engine)
+            grid_window = Gtk.ScrolledWindow()
+            grid_window.add(self.mines_grid)
+        else:
+            self.mines_grid = grid_window = MinesGrid(board_pool=board_pool,
+                                                      engine=engine)
+        self.content_box.pack_end(grid_window, expand=True, fill=True,
                                   padding=0)
         self.mines_grid.engine.flags_changed_event.add(self._on_flags_changed)
         self._on_flags_changed()
@@ -65,6 +84,20 @@ class MinesweeperUI:
         self.step_button.set_sensitive(False)
 
 
-ui = MinesweeperUI()
+parser = ArgumentParser(description='Minesweeper with a solver')
+parser.add_argument('--difficulty', type=int, default=2, choices=range(3),
+                    help='0: beginner, 1: intermediate, 2: expert')
+parser.add_argument('--board', type=int, nargs=3,
+                    metavar=('ROWS', 'COLS', 'MINES'),
+                    help='custom board, overrides --difficulty')
+parser.add_argument('--canvas', action='store_true',
+                    help='draw the board on a single canvas, for large'
+                         ' boards')
+parser.add_argument('--engine', default='list', choices=ENGINES,
+                    help='game engine behind the board')
+args = parser.parse_args()
+
+ui = MinesweeperUI(tuple(args.board) if args.board else args.difficulty,
+                   args.canvas, args.engine)
 ui.window.show_all()
 Gtk.main()
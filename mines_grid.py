@@ -12,10 +12,13 @@ from gi.repository import Gtk, Gdk
 
 
 class MinesGrid(Gtk.Grid):
-    def __init__(self, game=None, **properties):
+    def __init__(self, game=None, board_pool=None, engine=None,
+                 **properties):
         Gtk.Grid.__init__(self, **properties)
-        self.engine = GameEngine(game)
-        self.engine.update_event.add(self._on_cell_update)
+        self.engine = engine if engine is not None else GameEngine(game)
+        # no-guess boards are taken from this no_guess.BoardPool if given
+        self.board_pool = board_pool
+        self.engine.cells_update_event.add(self._on_cells_update)
         self.engine.game_over_event.add(self._on_game_over)
         self.game_in_progress = True
         self.solver = MinesweeperSolver(self.engine)
@@ -34,15 +37,25 @@ class MinesGrid(Gtk.Grid):
                 button.connect('toggled', self._on_button_toggled, (ri, ci))
                 button.set_size_request(40, 40)
                 self.attach(button, ci, ri, 1, 1)
+        if board_pool is not None:
+            self.new_game()
 
     def new_game(self):
         self.game_in_progress = True
-        self.engine.generate_minefield()
+        first = None
+        if self.board_pool is not None:
+            mines, first = self.board_pool.get()
+            self.engine.generate_minefield(mines)
+        else:
+            self.engine.generate_minefield()
         self.solver.reset()
         for grid_button in chain(*self.buttons):
             grid_button.set_sensitive(True)
             grid_button.set_label('')
             grid_button.set_active(False)
+        if first is not None:
+            # no-guess boards are only guaranteed from their first click
+            self.engine.dig(*first)
 
     def end_game(self):
         if self.game_in_progress:
@@ -50,6 +63,10 @@ class MinesGrid(Gtk.Grid):
             for grid_button in chain(*self.buttons):
                 grid_button.set_sensitive(False)
 
+    def _on_cells_update(self, cells):
+        for r, c in cells:
+            self._on_cell_update(r, c)
+
     def _on_cell_update(self, r, c):
         value = self.engine.minefield[r][c]
         button = self.buttons[r][c]
@@ -82,14 +99,9 @@ class MinesGrid(Gtk.Grid):
 
     def _on_button_press_event(self, button, event_button: Gdk.EventButton,
                                position):
-        r, c = position
         if (event_button.button == 1 and
-                event_button.type == Gdk.EventType.DOUBLE_BUTTON_PRESS and
-                self.engine.minefield[r][c] ==
-                sum((self.engine.minefield[ri][ci] == Content.Flag)
-                    for ri, ci in self.engine.cells_around(r, c))):
-            for ri, ci in self.engine.cells_around(r, c):
-                self.engine.dig(ri, ci)
+                event_button.type == Gdk.EventType.DOUBLE_BUTTON_PRESS):
+            self.engine.chord(*position)
 
     def _on_game_over(self, result):
         self.end_game()
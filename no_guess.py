@@ -0,0 +1,192 @@
+"""No-guess board generation and an on-disk pool of pre-generated boards.
+
+A board is no-guess when the solver wins it from its first click using
+certain moves only. Boards are generated by sampling a layout, playing it
+headless and, when the solver gets stuck, moving one of the mines on the
+stuck frontier to an unknown cell away from it.
+
+Usage: python no_guess.py --difficulty 2 --count 1000 --workers 8
+"""
+import os
+import struct
+from argparse import ArgumentParser
+from multiprocessing import Pool, cpu_count
+from random import Random
+from time import perf_counter
+
+from common import Result, GameError, POOL_DIR
+from game_engine import GameEngine
+from recording import encode_layout, decode_layout
+from solver import MinesweeperSolver
+
+_first_click = struct.Struct('<I')
+
+
+def generate_no_guess(engine, solver, first=None, max_repairs=100,
+                      max_attempts=100):
+    """Returns the flat mine indices of a board which the solver wins from
+    first, the centre cell by default, and the first click. The engine's
+    rng drives the sampling and the repairs. Raises GameError if none of
+    max_attempts sampled layouts could be repaired into such a board"""
+    rows, cols = engine.rows, engine.cols
+    if first is None:
+        first = rows // 2, cols // 2
+    safe = {ri * cols + ci for ri, ci in engine.cells_around(*first)}
+    safe.add(first[0] * cols + first[1])
+    cells = [i for i in range(rows * cols) if i not in safe]
+    if engine.mine_count > len(cells):
+        raise ValueError('{} mines do not fit in the {} cells away from the'
+                         ' first click'.format(engine.mine_count, len(cells)))
+    for _ in range(max_attempts):
+        mines = set(engine.rng.sample(cells, engine.mine_count))
+        for _ in range(max_repairs):
+            engine.generate_minefield(sorted(mines))
+            solver.reset()
+            engine.dig(*first)
+            solver.solve_until_stuck()
+            if engine.result == Result.Win:
+                return sorted(mines), first
+            if not _repair(engine, mines, safe):
+                break
+    raise GameError('no no-guess board of {}x{} with {} mines found in {}'
+                    ' attempts'.format(rows, cols, engine.mine_count,
+                                       max_attempts))
+
+
+def _repair(engine, mines, safe):
+    """Moves a random mine of the stuck frontier to an unknown cell which
+    touches no revealed cell. Returns False if either does not exist"""
+    cols = engine.cols
+    frontier = []
+    targets = []
+    for r, c in engine.all_indices():
+        if not engine.is_unknown(r, c):
+            continue
+        i = r * cols + c
+        if engine.unknowns_around(r, c) + engine.flags_around(r, c) < len(
+                engine.cells_around(r, c)):
+            if i in mines:
+                frontier.append(i)
+        elif i not in mines and i not in safe:
+            targets.append(i)
+    if not frontier or not targets:
+        return False
+    mines.remove(engine.rng.choice(frontier))
+    mines.add(engine.rng.choice(targets))
+    return True
+
+
+def _generate_task(args):
+    game, seed = args
+    engine = GameEngine(game, Random(seed))
+    return generate_no_guess(engine, MinesweeperSolver(engine, report=False))
+
+
+class BoardPool:
+    """ File of pre-generated no-guess boards of one size, stored as fixed
+    size records of the first click index and the encoded layout. Boards
+    are appended by fill and taken from the end, so taking one is a read
+    and a truncate"""
+
+    def __init__(self, directory, game):
+        self.game = game
+        self._engine = GameEngine(game)
+        self._solver = None
+        rows, cols, mines = (self._engine.rows, self._engine.cols,
+                             self._engine.mine_count)
+        self.path = os.path.join(directory,
+                                 '{}x{}x{}.bin'.format(rows, cols, mines))
+        self.record_size = (_first_click.size
+                            + len(encode_layout(rows, cols, range(mines))))
+
+    def __len__(self):
+        if not os.path.exists(self.path):
+            return 0
+        return os.path.getsize(self.path) // self.record_size
+
+    def _decode(self, record):
+        rows, cols, mines = decode_layout(record[_first_click.size:])
+        first = divmod(_first_click.unpack_from(record)[0], cols)
+        return mines, first
+
+    def put(self, mines, first):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'ab') as file:
+            file.write(_first_click.pack(first[0] * self._engine.cols
+                                         + first[1]))
+            file.write(encode_layout(self._engine.rows, self._engine.cols,
+                                     mines))
+
+    def take(self):
+        """Removes a board from the pool and returns its mines and first
+        click, or None if the pool is empty"""
+        if not len(self):
+            return None
+        with open(self.path, 'r+b') as file:
+            file.seek(-self.record_size, os.SEEK_END)
+            record = file.read(self.record_size)
+            file.truncate(file.tell() - self.record_size)
+        return self._decode(record)
+
+    def boards(self):
+        """Yields every board of the pool without removing them"""
+        if not len(self):
+            return
+        with open(self.path, 'rb') as file:
+            while True:
+                record = file.read(self.record_size)
+                if len(record) < self.record_size:
+                    return
+                yield self._decode(record)
+
+    def get(self):
+        """Takes a board, generating one here if the pool is empty"""
+        board = self.take()
+        if board is None:
+            if self._solver is None:
+                self._solver = MinesweeperSolver(self._engine, report=False)
+            board = generate_no_guess(self._engine, self._solver)
+        return board
+
+    def fill(self, count, workers=None, seed=None):
+        """Generates count boards across a pool of workers and appends them
+        to the pool file"""
+        if seed is None:
+            seed = Random().randrange(1 << 32)
+        tasks = [(self.game, seed + i) for i in range(count)]
+        workers = workers or cpu_count()
+        if workers == 1:
+            for board in map(_generate_task, tasks):
+                self.put(*board)
+            return
+        with Pool(workers) as pool:
+            for board in pool.imap_unordered(_generate_task, tasks):
+                self.put(*board)
+
+
+def main(argv=None):
+    parser = ArgumentParser(description='Pre-generate no-guess boards')
+    parser.add_argument('--difficulty', type=int, default=2,
+                        choices=range(3),
+                        help='0: beginner, 1: intermediate, 2: expert')
+    parser.add_argument('--board', type=int, nargs=3,
+                        metavar=('ROWS', 'COLS', 'MINES'),
+                        help='custom board, overrides --difficulty')
+    parser.add_argument('--count', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=cpu_count())
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--pool', default=POOL_DIR,
+                        help='directory of the board pool files')
+    args = parser.parse_args(argv)
+
+    pool = BoardPool(args.pool,
+                     tuple(args.board) if args.board else args.difficulty)
+    start = perf_counter()
+    pool.fill(args.count, args.workers, args.seed)
+    elapsed = perf_counter() - start
+    print('Generated {} boards in {:.2f}s, {} in {}'.format(
+        args.count, elapsed, len(pool), pool.path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+from common import Content, LRUCache
+
+# marks cells of the signature which fall outside the board
+OFF_BOARD = 99
+# the signature covers the 5x5 enumeration window and the ring of cells
+# around it which the window's number cells depend on
+RADIUS = 3
+
+_ring_values = {Content.Flag: Content.Flag,
+                Content.Unknown: Content.Unknown,
+                Content.QuestionMark: Content.Unknown}
+
+_offsets = [(dr, dc)
+            for dr in range(-RADIUS, RADIUS + 1)
+            for dc in range(-RADIUS, RADIUS + 1)]
+_on_ring = [max(abs(dr), abs(dc)) == RADIUS for dr, dc in _offsets]
+_offset_index = {offset: i for i, offset in enumerate(_offsets)}
+
+# rotations and reflections of the square as (a, b, c, d) mapping an
+# offset (dr, dc) to (a * dr + b * dc, c * dr + d * dc)
+_transforms = [
+    (1, 0, 0, 1), (0, 1, -1, 0), (-1, 0, 0, -1), (0, -1, 1, 0),
+    (1, 0, 0, -1), (-1, 0, 0, 1), (0, 1, 1, 0), (0, -1, -1, 0),
+]
+
+
+def _apply(transform, offset):
+    a, b, c, d = transform
+    return a * offset[0] + b * offset[1], c * offset[0] + d * offset[1]
+
+
+def _apply_inverse(transform, offset):
+    # the transforms are orthogonal so the inverse is the transpose
+    a, b, c, d = transform
+    return a * offset[0] + c * offset[1], b * offset[0] + d * offset[1]
+
+
+# index permutations that read the signature in every transformed frame
+_permutations = [
+    [_offset_index[_apply(transform, offset)] for offset in _offsets]
+    for transform in _transforms
+]
+
+
+class PatternCache:
+    """ Memoizes the mine and non-mine cells deduced around a position by
+    the window enumeration. Keys are the cell contents around the position,
+    optionally reduced to a canonical rotation/reflection, and values are
+    the deduced cells as offsets from the position"""
+
+    def __init__(self, maxsize=65536, symmetry=True):
+        self.cache = LRUCache(maxsize)
+        self.symmetry = symmetry
+
+    @property
+    def hits(self):
+        return self.cache.hits
+
+    @property
+    def misses(self):
+        return self.cache.misses
+
+    def signature(self, minefield, position):
+        """Returns the canonical key of the area around position and the
+        transform that maps the canonical frame back onto the board"""
+        size = minefield.size()
+        r, c = position
+        values = []
+        for (dr, dc), on_ring in zip(_offsets, _on_ring):
+            ri = r + dr
+            ci = c + dc
+            if on_ring:
+                # outer ring cells only count as flags or unknowns
+                values.append(
+                    _ring_values.get(int(minefield[ri][ci]), 0)
+                    if 0 <= ri < size[0] and 0 <= ci < size[1] else 0
+                )
+            elif 0 <= ri < size[0] and 0 <= ci < size[1]:
+                values.append(int(minefield[ri][ci]))
+            else:
+                values.append(OFF_BOARD)
+        if not self.symmetry:
+            return tuple(values), _transforms[0]
+        return min(
+            (tuple(values[i] for i in permutation), transform)
+            for permutation, transform in zip(_permutations, _transforms)
+        )
+
+    def get(self, minefield, position):
+        """Returns the cached (mines, non_mines) positions and the key, or
+        None and the key to store the result under"""
+        key, transform = self.signature(minefield, position)
+        result = self.cache.get(key)
+        if result is None:
+            return None, (key, transform)
+        return tuple(
+            [position + _apply(transform, offset) for offset in offsets]
+            for offsets in result
+        ), (key, transform)
+
+    def put(self, signature, position, mines, non_mines):
+        key, transform = signature
+        self.cache.put(key, tuple(
+            tuple(_apply_inverse(transform, position_i - position)
+                  for position_i in positions)
+            for positions in (mines, non_mines)
+        ))
+
+    def clear(self):
+        self.cache.clear()
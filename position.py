@@ -1,11 +1,22 @@
-class Position:
-    def __init__(self, row, col=None):
-        if isinstance(row, (Position, tuple, list)):
-            self.row = row[0]
-            self.col = row[1]
-        else:
-            self.row = row
-            self.col = col
+from operator import itemgetter
+
+# lookup tables shared by all boards of the same size, keyed by (rows, cols)
+_tables = {}
+
+
+class Position(tuple):
+    """ Immutable (row, col) pair. Being a tuple it hashes and compares equal
+    to plain (row, col) tuples, supports tuple unwrapping (r, c = position)
+    and index access (r = position[0])"""
+    __slots__ = ()
+
+    def __new__(cls, row, col=None):
+        if col is None:
+            row, col = row
+        return tuple.__new__(cls, (row, col))
+
+    row = property(itemgetter(0))
+    col = property(itemgetter(1))
 
     @classmethod
     def cast(cls, obj):
@@ -14,52 +25,21 @@ class Position:
         else:
             return cls(obj)
 
-    # This function is implemented as a way to allow tuple unwrapping that
-    # is used in existing content. Example: r, c = position
-    def __iter__(self):
-        yield self.row
-        yield self.col
-
-    # This function is implemented as a way to allow index accessing using
-    # tuple that is used in existing content. Example: r = position[0]
-    def __getitem__(self, item):
-        if item == 1:
-            return self.col
-        elif item == 0:
-            return self.row
-        else:
-            raise KeyError
-
-    def __len__(self):
-        return 2
-
     def __str__(self):
-        return "{{{}, {}}}".format(self.row, self.col)
+        return "{{{}, {}}}".format(self[0], self[1])
 
     def __repr__(self):
-        return "{{{}, {}}}".format(self.row, self.col)
+        return "{{{}, {}}}".format(self[0], self[1])
 
     """Adds another position or tuple and returns a new Position Object"""
     def __add__(self, other):
-        return Position(self.row + other[0], self.col + other[1])
+        return Position(self[0] + other[0], self[1] + other[1])
 
     def __radd__(self, other):
         return self.__add__(other)
 
     def __sub__(self, other):
-        return Position(self.row - other[0], self.col - other[1])
-
-    def __hash__(self, *args, **kwargs):
-        return self.row << 16 + self.col
-
-    def __eq__(self, other):
-        if isinstance(other, Position):
-            return self.row == other.row and self.col == other.col
-        else:
-            try:
-                return self.row == other[0] and self.col == other[1]
-            except TypeError:
-                return False
+        return Position(self[0] - other[0], self[1] - other[1])
 
     def check_bounds(self, lower, upper):
         return (lower[0] <= self[0] < upper[0]
@@ -73,3 +53,36 @@ class Position:
         yield from (Position(r, c)
                     for r in range(start[0], end[0])
                     for c in range(start[1], end[1]))
+
+
+class BoardTables:
+    """ Lookup tables for one board size, built once and shared by every
+    engine, List2D and View2D of that size. Cells are addressed either by
+    [row][col] or by the flat index row * cols + col"""
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.grid = [[Position(r, c) for c in range(cols)]
+                     for r in range(rows)]
+        self.positions = [position for row in self.grid for position in row]
+        self.neighbours = [
+            tuple(ri * cols + ci
+                  for ri in range(max(0, r - 1), min(rows, r + 2))
+                  for ci in range(max(0, c - 1), min(cols, c + 2))
+                  if ri != r or ci != c)
+            for r, c in self.positions
+        ]
+        self.neighbour_counts = [len(indices) for indices in self.neighbours]
+        self.positions_around = [
+            [tuple(self.positions[i] for i in self.neighbours[r * cols + c])
+             for c in range(cols)]
+            for r in range(rows)
+        ]
+
+    @classmethod
+    def get(cls, rows, cols):
+        tables = _tables.get((rows, cols))
+        if tables is None:
+            tables = _tables[rows, cols] = cls(rows, cols)
+        return tables
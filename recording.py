@@ -0,0 +1,144 @@
+"""Compact binary recording and replay of games.
+
+A recording is a stream of records, each starting with a one byte tag:
+  b'G' new game:  rows, cols, mine count as '<HHI' followed by the mine
+                  layout packed one bit per cell (bit row * cols + col)
+  b'M' move:      action, content and cell index as '<BbI'
+
+Usage: python recording.py games.bin [--profile out.prof]
+"""
+import struct
+from argparse import ArgumentParser
+from time import perf_counter
+
+from common import Action, Content, Result
+from game_engine import GameEngine
+
+GAME_TAG = b'G'
+MOVE_TAG = b'M'
+_game_header = struct.Struct('<HHI')
+_move = struct.Struct('<BbI')
+
+
+def encode_layout(rows, cols, mines):
+    """Packs the flat mine indices into a header and a bitmask"""
+    bits = 0
+    for i in mines:
+        bits |= 1 << i
+    return (_game_header.pack(rows, cols, len(mines))
+            + bits.to_bytes((rows * cols + 7) // 8, 'little'))
+
+
+def decode_layout(data):
+    """Returns rows, cols and the flat mine indices of an encoded layout"""
+    rows, cols, mine_count = _game_header.unpack_from(data)
+    bits = int.from_bytes(data[_game_header.size:], 'little')
+    mines = []
+    while bits:
+        low = bits & -bits
+        mines.append(low.bit_length() - 1)
+        bits ^= low
+    if len(mines) != mine_count:
+        raise ValueError('corrupt layout')
+    return rows, cols, mines
+
+
+class GameRecorder:
+    """ Streams the games and player actions of an engine to a binary file
+    as they happen"""
+
+    def __init__(self, engine, file):
+        self.engine = engine
+        self.file = file
+        engine.new_game_event.add(self._on_new_game)
+        engine.action_event.add(self._on_action)
+
+    def close(self):
+        self.engine.new_game_event.remove(self._on_new_game)
+        self.engine.action_event.remove(self._on_action)
+        self.file.flush()
+
+    def _on_new_game(self):
+        self.file.write(GAME_TAG)
+        self.file.write(encode_layout(self.engine.rows, self.engine.cols,
+                                      self.engine.mine_indices()))
+
+    def _on_action(self, action, r, c, content):
+        self.file.write(MOVE_TAG)
+        self.file.write(_move.pack(action, content or 0,
+                                   r * self.engine.cols + c))
+
+
+def read_records(file):
+    """Yields ('game', (rows, cols, mines)) and ('move', (action, content,
+    index)) records from a recording"""
+    while True:
+        tag = file.read(1)
+        if not tag:
+            return
+        if tag == GAME_TAG:
+            header = file.read(_game_header.size)
+            rows, cols, mine_count = _game_header.unpack(header)
+            data = header + file.read((rows * cols + 7) // 8)
+            yield 'game', decode_layout(data)
+        elif tag == MOVE_TAG:
+            yield 'move', _move.unpack(file.read(_move.size))
+        else:
+            raise ValueError('unknown record tag {!r}'.format(tag))
+
+
+def replay(file, engine_class=GameEngine):
+    """Re-drives an engine through every recorded game and yields the
+    engine at the end of each game"""
+    engine = None
+    for kind, record in read_records(file):
+        if kind == 'game':
+            if engine is not None:
+                yield engine
+            rows, cols, mines = record
+            if (engine is None or engine.rows != rows
+                    or engine.cols != cols):
+                engine = engine_class((rows, cols, len(mines)))
+            engine.generate_minefield(mines)
+        else:
+            action, content, index = record
+            r, c = divmod(index, engine.cols)
+            if action == Action.Dig:
+                engine.dig(r, c)
+            elif action == Action.ToggleFlag:
+                engine.toggle_flag(r, c)
+            elif action == Action.SetFlag:
+                engine.set_flag(r, c, Content(content))
+            elif action == Action.Chord:
+                engine.chord(r, c)
+    if engine is not None:
+        yield engine
+
+
+def main(argv=None):
+    parser = ArgumentParser(description='Replay recorded games')
+    parser.add_argument('recording')
+    parser.add_argument('--profile',
+                        help='write a cProfile profile of the replay')
+    args = parser.parse_args(argv)
+
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    games = wins = 0
+    start = perf_counter()
+    with open(args.recording, 'rb') as file:
+        for engine in replay(file):
+            games += 1
+            wins += engine.result == Result.Win
+    elapsed = perf_counter() - start
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+    print('Games: {}, Wins: {}, Time: {:.2f}s'.format(games, wins, elapsed))
+
+
+if __name__ == '__main__':
+    main()
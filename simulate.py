@@ -0,0 +1,262 @@
+"""Headless batch runner that plays many games without the GTK interface.
+
+Usage: python simulate.py --difficulty 2 --games 100000 --workers 8
+       python simulate.py --board 1000 1000 150000 --engine chunked --games 1
+"""
+import cProfile
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
+from itertools import islice
+from multiprocessing import Pool, cpu_count
+from time import perf_counter
+
+from common import Result
+from engines import ENGINES, create_engine
+from no_guess import BoardPool
+from recording import GameRecorder
+from solver import MinesweeperSolver
+from solver_stats import SolverStats
+
+
+class SimulationStats:
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        self.losses = 0
+        self.count_simple = 0
+        self.count_enum = 0
+        self.count_random = 0
+        self.loss_by = Counter()
+        self.pattern_hits = 0
+        self.pattern_misses = 0
+        self.solver_stats = SolverStats()
+
+    def add_game(self, solver, result):
+        self.games += 1
+        if result == Result.Win:
+            self.wins += 1
+        else:
+            self.losses += 1
+        self.count_simple += solver._count_simple
+        self.count_enum += solver._count_enum
+        self.count_random += solver._count_random
+        if solver._loss_by:
+            self.loss_by[solver._loss_by] += 1
+
+    def merge(self, other):
+        self.games += other.games
+        self.wins += other.wins
+        self.losses += other.losses
+        self.count_simple += other.count_simple
+        self.count_enum += other.count_enum
+        self.count_random += other.count_random
+        self.loss_by.update(other.loss_by)
+        self.pattern_hits += other.pattern_hits
+        self.pattern_misses += other.pattern_misses
+        self.solver_stats.merge(other.solver_stats)
+        return self
+
+    def __str__(self):
+        lines = [
+            'Games: {}'.format(self.games),
+            'Wins: {} ({:.2%})'.format(self.wins,
+                                        self.wins / max(1, self.games)),
+            'Losses: {}'.format(self.losses),
+            'Simple Explore: {}'.format(self.count_simple),
+            'Model Enumeration: {}'.format(self.count_enum),
+            'Random Explore: {}'.format(self.count_random),
+        ]
+        lines.extend('Loss By {}: {}'.format(strategy, count)
+                     for strategy, count in self.loss_by.most_common())
+        if self.pattern_hits or self.pattern_misses:
+            lines.append('Pattern Cache: {} hits, {} misses'.format(
+                self.pattern_hits, self.pattern_misses))
+        for strategy, histogram in sorted(self.solver_stats.times.items()):
+            lines.append('{} Time: {:.0f}us total, {:.1f}us mean'.format(
+                strategy, histogram.total, histogram.mean))
+        return '\n'.join(lines)
+
+
+def play_games(game, count, engine='list', solver_options=None, seed=None,
+               boards=None, profiler=None, record_file=None):
+    """Plays count games, or the given (mines, first click) boards starting
+    from their first click"""
+    engine = create_engine(game, engine)
+    solver = MinesweeperSolver(engine, report=False, **(solver_options or {}))
+    recorder = GameRecorder(engine, record_file) if record_file else None
+    stats = SimulationStats()
+    for i in range(count):
+        if seed is not None:
+            # game i of the run always gets the same seed however the games
+            # are split between workers
+            engine.rng.seed(seed + i)
+        if boards is not None:
+            mines, first = boards[i]
+            engine.generate_minefield(mines)
+            solver.reset()
+            engine.dig(*first)
+        else:
+            engine.generate_minefield()
+            solver.reset()
+        stats.add_game(solver, solver.play(profiler))
+    stats.solver_stats = solver.stats
+    if recorder is not None:
+        recorder.close()
+    if solver.pattern_cache is not None:
+        stats.pattern_hits = solver.pattern_cache.hits
+        stats.pattern_misses = solver.pattern_cache.misses
+    return stats
+
+
+def _play_games_task(args):
+    return play_games(*args)
+
+
+def _play_batch_task(args):
+    from batch_engine import play_batch
+    *args, batch_size = args
+    return play_batch(*args, batch_size=batch_size)
+
+
+def simulate(game, games, workers=None, chunk_size=None, engine='list',
+             solver_options=None, seed=None, profiler=None, record_file=None,
+             boards=None, batch_size=None):
+    """Plays the games across a pool of workers and returns the merged
+    SimulationStats. With a seed every game gets its own derived seed, so
+    results do not depend on the number of workers. Profiling and recording
+    run every game in this process. Given a list of boards, those are
+    played instead of generated ones. With a batch_size the games are
+    played in lockstep batches by batch_engine, which neither profiles nor
+    records"""
+    if boards is not None:
+        games = len(boards)
+    if profiler is not None or record_file is not None:
+        workers = 1
+    workers = workers or cpu_count()
+    if chunk_size is None and batch_size:
+        chunk_size = batch_size
+    if chunk_size is None:
+        chunk_size = max(1, min(1000, games // (workers * 4)))
+    chunks = [(game, min(chunk_size, games - start), engine, solver_options,
+               None if seed is None else seed + start,
+               None if boards is None else boards[start:start + chunk_size])
+              for start in range(0, games, chunk_size)]
+    stats = SimulationStats()
+    if batch_size:
+        chunks = [chunk + (batch_size,) for chunk in chunks]
+        if workers == 1:
+            for chunk in chunks:
+                stats.merge(_play_batch_task(chunk))
+            return stats
+        with Pool(workers) as pool:
+            for chunk_stats in pool.imap_unordered(_play_batch_task, chunks):
+                stats.merge(chunk_stats)
+        return stats
+    if workers == 1:
+        for chunk in chunks:
+            stats.merge(play_games(*chunk, profiler=profiler,
+                                   record_file=record_file))
+        return stats
+    with Pool(workers) as pool:
+        for chunk_stats in pool.imap_unordered(_play_games_task, chunks):
+            stats.merge(chunk_stats)
+    return stats
+
+
+def main(argv=None):
+    parser = ArgumentParser(description='Play Minesweeper games headless')
+    parser.add_argument('--difficulty', type=int, default=2,
+                        choices=range(3),
+                        help='0: beginner, 1: intermediate, 2: expert')
+    parser.add_argument('--board', type=int, nargs=3,
+                        metavar=('ROWS', 'COLS', 'MINES'),
+                        help='custom board, overrides --difficulty')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=cpu_count())
+    parser.add_argument('--engine', default='list',
+                        choices=ENGINES,
+                        help='board storage of the game engine, chunked'
+                             ' for huge boards')
+    parser.add_argument('--window', action='store_true',
+                        help='use the 5x5 window model enumeration')
+    parser.add_argument('--no-linear', action='store_true',
+                        help='skip the linear deduction before enumeration')
+    parser.add_argument('--no-subset', action='store_true',
+                        help='skip the pairwise constraint reduction')
+    parser.add_argument('--endgame', type=int, default=64, metavar='CELLS',
+                        help='solve exactly with the remaining mine count'
+                             ' below this many unknown cells, 0 to skip')
+    parser.add_argument('--endgame-budget', type=float, default=1.0,
+                        metavar='SECONDS',
+                        help='time allowed for one endgame solve')
+    parser.add_argument('--no-guess', metavar='POOL',
+                        help='play the no-guess boards of this pool'
+                             ' directory, at most --games of them')
+    parser.add_argument('--batch', type=int, metavar='SIZE',
+                        help='play the games in lockstep batches of this'
+                             ' many boards with NumPy')
+    parser.add_argument('--enum-workers', type=int,
+                        help='enumerate large frontier components on this'
+                             ' many processes, playing the games in one')
+    parser.add_argument('--seed', type=int,
+                        help='seed to make the games reproducible')
+    parser.add_argument('--record',
+                        help='record the games to this file in one process')
+    parser.add_argument('--stats-json', help='write solver stats as JSON')
+    parser.add_argument('--stats-csv', help='write solver stats as CSV')
+    parser.add_argument('--profile',
+                        help='profile the games in one process with cProfile'
+                             ' and write the profile to this file')
+    args = parser.parse_args(argv)
+    if args.batch and (args.record or args.profile):
+        parser.error('--record and --profile cannot be used with --batch')
+
+    game = tuple(args.board) if args.board else args.difficulty
+    boards = None
+    if args.no_guess:
+        boards = list(islice(BoardPool(args.no_guess, game).boards(),
+                             args.games))
+    solver_options = {
+        'global_enumeration': not args.window,
+        'linear_deduction': not args.no_linear,
+        'subset_reduction': not args.no_subset,
+        'endgame_cells': args.endgame,
+        'endgame_budget': args.endgame_budget,
+    }
+    executor = None
+    if args.enum_workers:
+        executor = ProcessPoolExecutor(args.enum_workers)
+        solver_options['executor'] = executor
+        args.workers = 1
+    profiler = cProfile.Profile() if args.profile else None
+    record_file = open(args.record, 'wb') if args.record else None
+    start = perf_counter()
+    stats = simulate(game, args.games, args.workers,
+                     engine=args.engine,
+                     solver_options=solver_options,
+                     seed=args.seed,
+                     profiler=profiler,
+                     record_file=record_file,
+                     boards=boards,
+                     batch_size=args.batch)
+    if record_file is not None:
+        record_file.close()
+    if executor is not None:
+        executor.shutdown()
+    elapsed = perf_counter() - start
+    print(stats)
+    print('Time: {:.2f}s ({:.1f} games/s)'.format(
+        elapsed, stats.games / elapsed if elapsed else 0))
+    if args.stats_json:
+        with open(args.stats_json, 'w') as file:
+            stats.solver_stats.to_json(file)
+    if args.stats_csv:
+        with open(args.stats_csv, 'w', newline='') as file:
+            stats.solver_stats.to_csv(file)
+    if profiler is not None:
+        profiler.dump_stats(args.profile)
+
+
+if __name__ == '__main__':
+    main()
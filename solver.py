@@ -1,58 +1,161 @@
-from itertools import compress
-from random import randrange
+from time import perf_counter
 
-from common import Result, Content, UniqueStack
+from common import Result, Content, UniquePriorityQueue
+from elimination import forced_cells
+from frontier import (FrontierIndex, get_components, get_probabilities,
+                      get_weights, enumerate_components)
 from game_engine import GameEngine
 from list2d import View2D
-from position import Position
+from pattern_cache import PatternCache
+from solver_stats import SolverStats
+from subset import SubsetReducer
+from window_model import WindowModel, enumerate_windows
 
 
 class MinesweeperSolver:
-    def __init__(self, game_engine: GameEngine):
+    def __init__(self, game_engine: GameEngine, report=True,
+                 global_enumeration=True, pattern_cache_size=65536,
+                 pattern_symmetry=True, rng=None, linear_deduction=True,
+                 subset_reduction=True, executor=None, endgame_cells=64,
+                 endgame_budget=1.0):
         self._engine = game_engine
-        self._engine.update_event.add(self._on_cell_update)
-        self._explore_stack = UniqueStack()
-        self._enum_stack = UniqueStack()
+        # shares the engine's generator so one seed reproduces a game
+        self.rng = rng if rng is not None else game_engine.rng
+        self.report = report
+        # enumerate the whole frontier at once instead of 5x5 windows
+        self.global_enumeration = global_enumeration
+        # row reduce the frontier constraints before enumerating models
+        self.linear_deduction = linear_deduction
+        # concurrent.futures executor the larger frontier components, or
+        # the queued windows, are enumerated on
+        self.executor = executor
+        # constraints of the revealed numbers, updated as cells change
+        self.frontier = FrontierIndex(game_engine)
+        # below this many unknown cells the whole board is solved exactly
+        # with the remaining mine count, spending at most endgame_budget
+        # seconds on it
+        self.endgame_cells = endgame_cells
+        self.endgame_budget = endgame_budget
+        # compare overlapping pairs of constraints before either of them
+        self.subset_reducer = (SubsetReducer(self.frontier)
+                               if subset_reduction else None)
+        # window enumeration results, kept across games
+        self.pattern_cache = (PatternCache(pattern_cache_size,
+                                           pattern_symmetry)
+                              if pattern_cache_size else None)
+        self._engine.cells_update_event.add(self._on_cells_update)
+        # number cells to check, the ones the simple rules can settle first
+        self._explore_queue = UniquePriorityQueue()
+        # undecided number cells, the ones with the fewest unknowns first
+        self._enum_queue = UniquePriorityQueue()
         self._count_simple = 0
         self._count_enum = 0
         self._count_random = 0
         self._loss_by = ''
+        # frontier components, built once per change of the board
+        self._components = None
+        self._frontier_components = None
+        # moves recorded while solve_until_stuck or play_game run
+        self._moves = None
+        # accumulated over all games until cleared
+        self.stats = SolverStats()
 
-    def _on_cell_update(self, r, c):
-        position = Position(r, c)
-        value = self._engine.minefield[position]
-        if value.is_number() or value == Content.Flag:
-            self._explore_stack.push_all(
-                position_i for position_i
-                in self._engine.minefield.positions_around(position)
-                if (self._engine.minefield[position_i].is_number())
-            )
-            if value > Content.NoMine:
-                self._explore_stack.push(position)
+    def _on_cells_update(self, cells):
+        self._components = None
+        self._frontier_components = None
+        changed = self.frontier.update(cells)
+        if self.subset_reducer is not None:
+            self.subset_reducer.update(changed)
+        minefield = self._engine.minefield
+        for position in cells:
+            value = minefield[position]
+            if value.is_number() or value == Content.Flag:
+                for position_i in minefield.positions_around(position):
+                    if minefield[position_i].is_number():
+                        self._push_explore(position_i)
+                if value > Content.NoMine:
+                    self._push_explore(position)
+
+    def _push_explore(self, position):
+        """Queues a number cell by how decisive it is, or drops it once it
+        has no unknown cells around it"""
+        r, c = position
+        unknowns = self._engine.unknowns_around(r, c)
+        if not unknowns:
+            self._explore_queue.discard(position)
+            self._enum_queue.discard(position)
+            return
+        mines = self._engine.minefield[r][c] - self._engine.flags_around(r, c)
+        if mines == 0 or mines == unknowns:
+            self._explore_queue.push(position, unknowns)
+        else:
+            self._explore_queue.push(position, 9 + unknowns)
 
     def reset(self):
-        self._explore_stack.clear()
-        self._enum_stack.clear()
+        self._explore_queue.clear()
+        self._enum_queue.clear()
         self._count_simple = 0
         self._count_enum = 0
         self._count_random = 0
         self._loss_by = ''
+        self._components = None
+        self._frontier_components = None
+        self.frontier.clear()
+        if self.subset_reducer is not None:
+            self.subset_reducer.clear()
+
+    def _timed(self, strategy, function):
+        start = perf_counter()
+        result = function()
+        self.stats.record_call(strategy, perf_counter() - start)
+        return result
 
     def solve(self):
-        if self._explore_stack and self._simple_explore():
+        """Makes a single move, the next certain one or else a guess"""
+        if not self._deduce():
+            self._guess()
+        self._finish_game()
+
+    def _deduce(self):
+        """Makes one certain move, returns False if there is none"""
+        self.stats.add('explore_queue', len(self._explore_queue))
+        self.stats.add('enum_queue', len(self._enum_queue))
+        if (self._explore_queue
+                and self._timed('Simple Explore', self._simple_explore)):
             self._count_simple += 1
             if self._engine.result == Result.Loss:
                 self._loss_by = 'Simple Explore'
-        elif self._enum_stack and self._enumerate_models():
+        elif (self._enum_queue and self.subset_reducer is not None
+              and self._timed('Subset Reduction', self._reduce_subsets)):
+            self.stats.count('subset_reductions')
+        elif (self._enum_queue and self.linear_deduction
+              and self._timed('Linear Deduction', self._deduce_linear)):
+            self.stats.count('linear_deductions')
+        elif (self._enum_queue
+              and self._timed('Model Enumeration', self._enumerate_models)):
             self._count_enum += 1
             if self._engine.result == Result.Loss:
                 self._loss_by = 'Model Enumeration'
+        elif (self._engine.unknown_count <= self.endgame_cells
+              and self._timed('Endgame', self._solve_endgame)):
+            self.stats.count('endgame_deductions')
         else:
-            self._explore_random_index()
-            self._count_random += 1
-            if self._engine.result == Result.Loss:
-                self._loss_by = 'Random Explore'
-        if self._engine.result != Result.OK:
+            return False
+        return True
+
+    def _guess(self):
+        self._timed('Random Explore', self._explore_random_index)
+        self._count_random += 1
+        if self._engine.result == Result.Loss:
+            self._loss_by = 'Random Explore'
+
+    def _finish_game(self):
+        if self._engine.result == Result.OK:
+            return
+        self.stats.count('games')
+        if self._engine.result == Result.Win:
+            self.stats.count('wins')
+        if self.report:
             print('Counts:')
             print('Simple Explore:', self._count_simple)
             print('Model Enumeration:', self._count_enum)
@@ -63,19 +166,67 @@ class MinesweeperSolver:
                 print(self._count_simple, self._count_enum,
                       self._count_random, self._loss_by, sep=',', file=file)
 
+    def _on_action(self, action, r, c, content):
+        self._moves.append((action, r, c))
+
+    def _record_moves(self, moves, function):
+        """Calls function, appending the moves it makes to moves"""
+        self._moves = moves
+        self._engine.action_event.add(self._on_action)
+        try:
+            function()
+        finally:
+            self._engine.action_event.remove(self._on_action)
+            self._moves = None
+
+    def _deduce_all(self):
+        while self._engine.result == Result.OK and self._deduce():
+            pass
+
+    def solve_until_stuck(self):
+        """Applies certain moves until neither the simple rules nor the
+        model enumeration can deduce anything more or the game is over.
+        Returns the moves made as (action, r, c) tuples"""
+        moves = []
+        if self._engine.result == Result.OK:
+            self._record_moves(moves, self._deduce_all)
+            self._finish_game()
+        return moves
+
+    def play_game(self):
+        """Plays the current game to the end, guessing only when no
+        certain move is left. Returns the result and the moves made"""
+        moves = []
+        while self._engine.result == Result.OK:
+            moves.extend(self.solve_until_stuck())
+            if self._engine.result == Result.OK:
+                self._record_moves(moves, self._guess)
+                self._finish_game()
+        return self._engine.result, moves
+
+    def play(self, profiler=None):
+        """Runs the solver until the current game is won or lost. A
+        cProfile.Profile passed as profiler is enabled for the whole game"""
+        if profiler is not None:
+            profiler.enable()
+        try:
+            return self.play_game()[0]
+        finally:
+            if profiler is not None:
+                profiler.disable()
+
     def _simple_explore(self):
-        while self._explore_stack:
-            current_position = self._explore_stack.pop()
+        while self._explore_queue:
+            current_position = self._explore_queue.pop()
+            self.stats.count('explore_pops')
             r, c = current_position
             if self._engine.minefield[r][c] <= Content.NoMine:
                 continue
 
-            unknowns = sum(self._engine.is_unknown(ri, ci) for ri, ci
-                           in self._engine.cells_around(r, c))
+            unknowns = self._engine.unknowns_around(r, c)
             if not unknowns:  # skip if there are no unknowns
                 continue
-            flags = sum(self._engine.minefield[ri][ci] == Content.Flag
-                        for ri, ci in self._engine.cells_around(r, c))
+            flags = self._engine.flags_around(r, c)
             if flags == self._engine.minefield[r][c]:
                 for position in (position for position
                                  in self._engine.cells_around(r, c)
@@ -88,29 +239,152 @@ class MinesweeperSolver:
                                  if self._engine.is_unknown(*position)):
                     self._engine.set_flag(*position, Content.Flag)
                 return True
-            self._enum_stack.push(current_position)
+            self._enum_queue.push(current_position, unknowns)
         return False
 
     def _explore_random_index(self):
         if self._engine.result == Result.OK:
+            position = self._get_best_guess()
+            if position is not None:
+                return self._engine.dig(*position)
             while True:
-                r = randrange(self._engine.rows)
-                c = randrange(self._engine.cols)
+                r = self.rng.randrange(self._engine.rows)
+                c = self.rng.randrange(self._engine.cols)
                 if self._engine.is_unknown(r, c):
                     return self._engine.dig(r, c)
 
+    def _get_best_guess(self):
+        """Returns one of the unknown cells with the lowest mine probability
+        or None if the probabilities could not be computed"""
+        components = self._frontier_components
+        if components is None:
+            components = self._get_components()
+            enumerate_components([component for component in components
+                                  if component.solutions is None],
+                                 self.executor)
+        components = [component for component in components
+                      if component.solutions]
+        frontier_cells = set()
+        for component in components:
+            frontier_cells.update(component.cells)
+        # cells of components that could not be enumerated are treated as
+        # unconstrained
+        other_count = self._engine.unknown_count - len(frontier_cells)
+        result = get_probabilities(
+            components, other_count,
+            self._engine.mine_count - self._engine.flags
+        )
+        if result is None:
+            return None
+        probabilities, other_probability = result
+        lowest = min(min(probabilities.values(), default=1.0),
+                     other_probability if other_count else 1.0)
+        candidates = [cell for cell, probability in probabilities.items()
+                      if probability <= lowest + 1e-9]
+        if (other_count and other_probability <= lowest + 1e-9
+                and self.rng.randrange(len(candidates) + other_count)
+                >= len(candidates)):
+            return self._get_other_cell(frontier_cells)
+        return self.rng.choice(candidates) if candidates else None
+
+    def _get_other_cell(self, frontier_cells):
+        """Returns a random unknown cell outside the frontier"""
+        # sampling is cheap while such cells are common, the scan is only
+        # needed towards the end of a game
+        for _ in range(64):
+            r = self.rng.randrange(self._engine.rows)
+            c = self.rng.randrange(self._engine.cols)
+            if (self._engine.is_unknown(r, c)
+                    and (r, c) not in frontier_cells):
+                return r, c
+        return self.rng.choice([
+            position for position in self._engine.all_indices()
+            if (self._engine.is_unknown(*position)
+                and position not in frontier_cells)
+        ])
+
+    def _get_components(self):
+        if self._components is None:
+            self._components = get_components(
+                self.frontier.get_constraints())
+        return self._components
+
+    def _reduce_subsets(self):
+        mines, non_mines = self.subset_reducer.deduce()
+        for position_i in mines:
+            self._engine.set_flag(*position_i, Content.Flag)
+        for position_i in non_mines:
+            self._engine.dig(*position_i)
+        return bool(mines or non_mines)
+
+    def _deduce_linear(self):
+        """Flags and digs the cells forced by the row reduced constraints of
+        the frontier"""
+        mines = []
+        non_mines = []
+        for component in self._get_components():
+            mines_i, non_mines_i = forced_cells(component)
+            mines.extend(mines_i)
+            non_mines.extend(non_mines_i)
+        for position_i in mines:
+            self._engine.set_flag(*position_i, Content.Flag)
+        for position_i in non_mines:
+            self._engine.dig(*position_i)
+        return bool(mines or non_mines)
+
+    def _solve_endgame(self):
+        """Flags and digs the cells which are certain once the remaining
+        mine count is taken into account. Every frontier component is
+        enumerated without a node limit until endgame_budget runs out, the
+        unconstrained cells are counted combinatorially"""
+        engine = self._engine
+        components = self._frontier_components
+        if components is None:
+            components = self._get_components()
+        deadline = perf_counter() + self.endgame_budget
+        for component in components:
+            if (component.solutions is None
+                    and not component.enumerate(1 << 62, deadline)):
+                self.stats.count('endgame_gave_up')
+                if self.report:
+                    print('Endgame: gave up on a component of {} cells'
+                          ' after {}s'.format(len(component),
+                                               self.endgame_budget))
+                return False
+            if not component.solutions:  # inconsistent flags
+                return False
+        # kept for the guess which follows when nothing is certain
+        self._frontier_components = components
+        frontier_count = sum(len(component) for component in components)
+        other_count = engine.unknown_count - frontier_count
+        result = get_weights(components, other_count,
+                             engine.mine_count - engine.flags)
+        if result is None:
+            return False
+        weights, other_mines, total = result
+        mines = [cell for cell, weight in weights.items() if weight == total]
+        non_mines = [cell for cell, weight in weights.items() if not weight]
+        if other_count and other_mines in (0, total * other_count):
+            others = [position for position in engine.all_indices()
+                      if engine.is_unknown(*position)
+                      and position not in weights]
+            (mines if other_mines else non_mines).extend(others)
+        for position_i in mines:
+            engine.set_flag(*position_i, Content.Flag)
+        for position_i in non_mines:
+            engine.dig(*position_i)
+        return bool(mines or non_mines)
+
     def _enumerate_models(self):
-        while self._enum_stack:
-            position = self._enum_stack.pop()
-            if not self._engine.minefield[position].is_open():
-                continue
-            unknowns = sum(
-                self._engine.minefield[position_i].is_unknown()
-                for position_i in self._engine.cells_around(*position)
-            )
-            # skip if there are no unknown cells
-            # or if there are no known cells around
-            if unknowns == 0:
+        if self.global_enumeration:
+            return self._enumerate_frontier()
+        if self.executor is not None:
+            return self._enumerate_windows()
+        while self._enum_queue:
+            position = self._enum_queue.pop()
+            self.stats.count('enum_pops')
+            # skip if there are no unknown cells around
+            if position not in self.frontier.constraints:
                 continue
 
             # Extracting the contents in the 5x5 area around the current cell
@@ -120,10 +394,8 @@ class MinesweeperSolver:
             position_end = self._engine.minefield.apply_bounds(
                 position + (3, 3))
 
-            mines, non_mines = self.get_mines_nonmines(
-                View2D(self._engine.minefield, position_start, position_end),
-                position
-            )
+            mines, non_mines = self._get_window_mines_nonmines(
+                position, position_start, position_end)
             if mines or non_mines:
                 for position_i in mines:
                     self._engine.set_flag(*position_i, Content.Flag)
@@ -132,171 +404,93 @@ class MinesweeperSolver:
                 return True
         return False
 
-    @classmethod
-    def get_mines_nonmines(cls, view, position_i):
-        interior_start = view.apply_bounds(position_i - (1, 1))
-        interior_end = view.apply_bounds(position_i + (2, 2))
-
-        # gets interior positions to be enumerated
-        interior_positions = [
-            position_i
-            for position_i in view.range(interior_start, interior_end)
-            if view[position_i] == Content.Unknown
-        ]
-
-        exterior_positions = [
-            position_i
-            for position_i in view.all_positions()
-            if (view[position_i] == Content.Unknown
-                and not position_i.check_bounds(interior_start, interior_end))
-        ]
-        cls._add_check_cells(exterior_positions, view)
-
-        flags = sum(content == Content.Flag
-                    for content in view.contents_around(position_i))
-        totals = [0 for _ in interior_positions]
-        count = 0
-        for interior_model in cls._get_interior_models(
-                view, view[position_i] - flags, interior_positions):
-            if (cls.is_model_valid(interior_model,
-                                   interior_start, interior_end)
-                and cls._has_exterior_model(
-                    interior_model, exterior_positions,
-                    interior_start, interior_end)):
-                count += 1
-                for i, position_i in enumerate(interior_positions):
-                    if interior_model[position_i] == Content.Flag:
-                        totals[i] += 1
-                if all(i != count for i in totals) and all(totals):
-                    for position_i in interior_positions:
-                        view[position_i] = Content.Unknown
-                    return False, False
-        for position_i in interior_positions:
-            view[position_i] = Content.Unknown
-        return (
-            list(compress(interior_positions, (i == count for i in totals))),
-            list(compress(interior_positions, (i == 0 for i in totals)))
-        )
-
-    @staticmethod
-    def is_model_valid(view, interior_start, interior_end):
-        grid = view.list2d
-        for pos_i in view.all_positions():
-            if grid[pos_i].is_number():
-                flags_around_i = sum(
-                    grid[pos_j] == Content.Flag
-                    for pos_j in grid.range(pos_i - (1, 1), pos_i + (2, 2))
-                )
-                if flags_around_i > grid[pos_i]:
-                    return False
-                if flags_around_i == grid[pos_i]:
+    def _enumerate_windows(self):
+        """Searches the windows of every queued cell at once on the
+        executor and applies the merged results, which all hold for the
+        current board"""
+        minefield = self._engine.minefield
+        mines = set()
+        non_mines = set()
+        models = []
+        signatures = []
+        while self._enum_queue:
+            position = self._enum_queue.pop()
+            self.stats.count('enum_pops')
+            if position not in self.frontier.constraints:
+                continue
+            signature = None
+            if self.pattern_cache is not None:
+                result, signature = self.pattern_cache.get(minefield,
+                                                           position)
+                if result is not None:
+                    mines.update(result[0])
+                    non_mines.update(result[1])
                     continue
-                unknowns_around_i = sum(
-                    grid[pos_j].is_unknown()
-                    for pos_j in grid.range(pos_i - (1, 1),
-                                            pos_i + (2, 2))
-                    if not pos_j.check_bounds(interior_start,
-                                              interior_end)
-                )
-                if flags_around_i + unknowns_around_i < grid[pos_i]:
-                    return False
-        return True
-
-    @classmethod
-    def _get_interior_models(cls, grid, flag_count, cells, cell_index=0):
-        if cell_index == len(cells):
-            yield grid
-            return
-        if flag_count == 0:
-            for position in cells[cell_index:]:
-                grid[position] = Content.Unknown
-            yield grid
-            return
-
-        if len(cells) - cell_index > flag_count:
-            grid[cells[cell_index]] = Content.Unknown
-            yield from cls._get_interior_models(
-                grid, flag_count, cells, cell_index + 1)
-
-        grid[cells[cell_index]] = Content.Flag
-        yield from cls._get_interior_models(
-            grid, flag_count - 1, cells, cell_index + 1)
+            models.append(WindowModel(
+                View2D(minefield, minefield.apply_bounds(position - (2, 2)),
+                       minefield.apply_bounds(position + (3, 3))),
+                position))
+            signatures.append(signature)
+        for model, signature, (mines_i, non_mines_i) in zip(
+                models, signatures,
+                enumerate_windows(models, self.executor, self.stats)):
+            mines_i = mines_i or []
+            non_mines_i = non_mines_i or []
+            if self.pattern_cache is not None:
+                self.pattern_cache.put(signature, model.position, mines_i,
+                                       non_mines_i)
+            mines.update(mines_i)
+            non_mines.update(non_mines_i)
+        for position_i in mines:
+            self._engine.set_flag(*position_i, Content.Flag)
+        for position_i in non_mines:
+            self._engine.dig(*position_i)
+        return bool(mines or non_mines)
 
-    @classmethod
-    def _has_exterior_model(cls, view, cells, interior_start, interior_end):
-        result = cls._has_exterior_model_impl(
-            view, cells, interior_start, interior_end, 0
-        )
-        for position, check_cells in cells:
-            view[position] = Content.Unknown
+    def _get_window_mines_nonmines(self, position, position_start,
+                                   position_end):
+        minefield = self._engine.minefield
+        if self.pattern_cache is None:
+            return self.get_mines_nonmines(
+                View2D(minefield, position_start, position_end),
+                position, self.stats)
+        result, signature = self.pattern_cache.get(minefield, position)
+        if result is None:
+            mines, non_mines = self.get_mines_nonmines(
+                View2D(minefield, position_start, position_end),
+                position, self.stats)
+            result = mines or [], non_mines or []
+            self.pattern_cache.put(signature, position, *result)
         return result
 
-    @classmethod
-    def _has_exterior_model_impl(cls, view, cells, interior_start,
-                                 interior_end, index):
-        if index == len(cells):
-            return True
-        if (cls._apply_and_validate(Content.Unknown, view, cells,
-                                    interior_start, interior_end, index)
-            and cls._has_exterior_model_impl(view, cells, interior_start,
-                                             interior_end, index + 1)):
-            return True
-        if cls._apply_and_validate(Content.Flag, view, cells, interior_start,
-                                   interior_end, index):
-            return cls._has_exterior_model_impl(
-                view, cells, interior_start, interior_end, index + 1
-            )
-
-    @staticmethod
-    def _apply_and_validate(content, view, cells, interior_start, interior_end,
-                            index):
-        grid = view.list2d
-        cell, check_cells = cells[index]
-        grid[cell] = content
-        for check_cell in check_cells:
-            flag_count = sum(
-                grid[position] == Content.Flag
-                for position in grid.positions_around(check_cell)
-            )
-            if check_cell.check_bounds(interior_start, interior_end):
-                if flag_count != grid[check_cell]:
-                    return False
+    def _enumerate_frontier(self):
+        self._enum_queue.clear()
+        mines = []
+        non_mines = []
+        components = self._get_components()
+        self.stats.add('frontier_components', len(components))
+        for component, enumerated in zip(
+                components, enumerate_components(components, self.executor)):
+            self.stats.add('component_cells', len(component))
+            self.stats.add('component_nodes', component.nodes)
+            if enumerated:
+                mines_i, non_mines_i = component.certain_cells()
+                mines.extend(mines_i)
+                non_mines.extend(non_mines_i)
             else:
-                if flag_count > grid[check_cell]:
-                    return False
-                if flag_count == grid[check_cell]:
-                    continue
-                unknowns = sum(
-                    grid[pos_i].is_unknown()
-                    for pos_i in grid.range(check_cell - (1, 1),
-                                            check_cell + (2, 2))
-                    if not pos_i.check_bounds(view.lower,
-                                              view.upper)
-                )
-                if flag_count + unknowns < grid[check_cell]:
-                    return False
-        return True
-
-    """ Adds all cells that need to be checked when a cell is marked or
-    unmarked. It does by checking all cells that need to be checked for the
-    last cell to be updated and ignoring those cells from being checked when
-    any other cell is updated. This is done iteratively.
-    """
+                self.stats.count('component_limit')
+        for position_i in mines:
+            self._engine.set_flag(*position_i, Content.Flag)
+        for position_i in non_mines:
+            self._engine.dig(*position_i)
+        if mines or non_mines:
+            return True
+        # kept for the guess which follows when nothing could be deduced
+        self._frontier_components = components
+        return False
 
     @staticmethod
-    def _add_check_cells(cells, grid):
-        ignore_cells = set()
-        current_cells = set()
-        for i in range(len(cells) - 1, -1, -1):
-            current_cells.clear()
-            current_cells.update(
-                cell_j
-                for cell_j in grid.positions_around(cells[i])
-                if grid[cell_j].is_number()
-            )
-            if current_cells:
-                current_cells -= ignore_cells
-                cells[i] = cells[i], list(current_cells)
-                ignore_cells |= current_cells
-            else:
-                del cells[i]
+    def get_mines_nonmines(view, position_i, stats=None):
+        """Returns the unknown cells around position_i that are mines and
+        the ones that are safe in every model of the view"""
+        return WindowModel(view, position_i).mines_nonmines(stats)
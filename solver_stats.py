@@ -0,0 +1,108 @@
+import csv
+import json
+from collections import Counter, defaultdict
+from copy import deepcopy
+
+
+class Histogram:
+    """ Histogram with power of two buckets: bucket i holds the values v with
+    int(v).bit_length() == i, so bucket 0 is 0, bucket 1 is 1, bucket 2 is
+    2-3, bucket 3 is 4-7 and so on"""
+
+    def __init__(self):
+        self.buckets = Counter()
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        self.buckets[int(value).bit_length()] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        self.buckets.update(other.buckets)
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.mean,
+            'max': self.max,
+            'buckets': {(1 << i) >> 1: n
+                        for i, n in sorted(self.buckets.items())},
+        }
+
+
+class SolverStats:
+    """ Instrumentation collected by MinesweeperSolver: calls and wall time
+    (in microseconds) of every strategy, event counters and histograms of
+    sizes such as stack lengths and backtracking depths. Stats of separate
+    solvers or processes can be combined with merge"""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.times = defaultdict(Histogram)
+        self.counters = Counter()
+        self.histograms = defaultdict(Histogram)
+
+    def record_call(self, strategy, seconds):
+        self.calls[strategy] += 1
+        self.times[strategy].add(seconds * 1e6)
+
+    def count(self, name, value=1):
+        self.counters[name] += value
+
+    def add(self, name, value):
+        self.histograms[name].add(value)
+
+    def snapshot(self):
+        return deepcopy(self)
+
+    def merge(self, other):
+        self.calls.update(other.calls)
+        self.counters.update(other.counters)
+        for name, histogram in other.times.items():
+            self.times[name].merge(histogram)
+        for name, histogram in other.histograms.items():
+            self.histograms[name].merge(histogram)
+        return self
+
+    def clear(self):
+        self.__init__()
+
+    def to_dict(self):
+        return {
+            'calls': dict(self.calls),
+            'times_us': {name: histogram.to_dict()
+                         for name, histogram in self.times.items()},
+            'counters': dict(self.counters),
+            'histograms': {name: histogram.to_dict()
+                           for name, histogram in self.histograms.items()},
+        }
+
+    def to_json(self, file):
+        json.dump(self.to_dict(), file, indent=2, sort_keys=True)
+
+    def to_csv(self, file):
+        """Writes one row per strategy, counter and histogram"""
+        writer = csv.writer(file)
+        writer.writerow(['kind', 'name', 'count', 'total', 'mean', 'max'])
+        for name, histogram in sorted(self.times.items()):
+            writer.writerow(['time_us', name, histogram.count,
+                             histogram.total, histogram.mean, histogram.max])
+        for name, value in sorted(self.counters.items()):
+            writer.writerow(['counter', name, value, value, '', ''])
+        for name, histogram in sorted(self.histograms.items()):
+            writer.writerow(['histogram', name, histogram.count,
+                             histogram.total, histogram.mean, histogram.max])
@@ -0,0 +1,55 @@
+class SubsetReducer:
+    """ Compares the number constraints of a FrontierIndex pairwise. Changed
+    constraints are only queued by update, the pairwise rules are applied
+    when deduce runs, comparing each changed constraint with the
+    constraints it shares cells with"""
+
+    def __init__(self, index):
+        self.index = index
+        self._dirty = set()
+
+    def clear(self):
+        self._dirty.clear()
+
+    def update(self, positions):
+        self._dirty.update(positions)
+
+    def deduce(self):
+        """Returns the cells found to be mines and the cells found to be
+        safe by comparing changed constraints with overlapping ones"""
+        constraints = self.index.constraints
+        cell_constraints = self.index.cell_constraints
+        mines = set()
+        non_mines = set()
+        while self._dirty:
+            position = self._dirty.pop()
+            constraint = constraints.get(position)
+            if constraint is None:
+                continue
+            others = set()
+            for cell in constraint[1]:
+                others.update(cell_constraints[cell])
+            others.discard(position)
+            for other in others:
+                self._compare(constraint, constraints[other], mines,
+                              non_mines)
+                self._compare(constraints[other], constraint, mines,
+                              non_mines)
+        return list(mines), list(non_mines)
+
+    @staticmethod
+    def _compare(a, b, mines, non_mines):
+        """Applies the rules which follow from b holding at least b_mines -
+        a_mines mines outside of a"""
+        a_mines, a_cells = a
+        b_mines, b_cells = b
+        only_b = b_cells - a_cells
+        if not only_b:
+            return
+        if b_mines - a_mines == len(only_b):
+            # every cell of b outside of a is a mine and no mine of a lies
+            # outside of b
+            mines.update(only_b)
+            non_mines.update(a_cells - b_cells)
+        elif b_mines == a_mines and a_cells <= b_cells:
+            non_mines.update(only_b)
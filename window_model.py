@@ -0,0 +1,175 @@
+from common import Content
+
+
+class WindowModel:
+    """ The unknown cells of an enumeration window as 0/1 variables and the
+    number cells of the window as constraints over them. Every constraint
+    keeps the mines it still needs and its unassigned variables as counters
+    that are updated in O(1) when a variable is assigned or unassigned, so
+    a partial assignment is rejected as soon as one constraint cannot be
+    met. Unknown cells outside the window are free: they only widen the
+    constraints of the window's border numbers"""
+
+    def __init__(self, view, position):
+        self.position = position
+        interior_start = view.apply_bounds(position - (1, 1))
+        interior_end = view.apply_bounds(position + (2, 2))
+        self.cells = [position_i for position_i in view.all_positions()
+                      if view[position_i] == Content.Unknown]
+        index = {cell: i for i, cell in enumerate(self.cells)}
+        interior = {i for i, cell in enumerate(self.cells)
+                    if cell.check_bounds(interior_start, interior_end)}
+
+        grid = view.list2d
+        # needed mines, variables and free unknown cells of each number
+        self.constraints = []
+        for position_i in view.all_positions():
+            value = view[position_i]
+            if not value.is_number():
+                continue
+            variables = []
+            flags = 0
+            free = 0
+            for position_j in grid.positions_around(position_i):
+                i = index.get(position_j)
+                if i is not None:
+                    variables.append(i)
+                elif grid[position_j] == Content.Flag:
+                    flags += 1
+                elif grid[position_j].is_unknown():
+                    free += 1
+            if variables:
+                self.constraints.append((value - flags, variables, free))
+        self.cell_constraints = [[] for _ in self.cells]
+        for k, (mines, variables, free) in enumerate(self.constraints):
+            for i in variables:
+                self.cell_constraints[i].append(k)
+
+        # interior cells are enumerated fully, the exterior ones only need
+        # one extension of each interior model
+        self.interior = self._order(sorted(interior))
+        self.exterior = self._order([i for i in range(len(self.cells))
+                                     if i not in interior], self.interior)
+        # search effort of the last mines_nonmines call
+        self.interior_models = 0
+        self.exterior_nodes = 0
+
+    def _order(self, cells, placed=()):
+        """Orders cells most constrained first: each next cell shares the
+        most constraints with the cells placed before it, ties going to
+        the cell in the most constraints"""
+        placed_constraints = set()
+        for i in placed:
+            placed_constraints.update(self.cell_constraints[i])
+        cells = list(cells)
+        order = []
+        while cells:
+            best = max(cells, key=lambda i: (
+                sum(k in placed_constraints
+                    for k in self.cell_constraints[i]),
+                len(self.cell_constraints[i])))
+            cells.remove(best)
+            order.append(best)
+            placed_constraints.update(self.cell_constraints[best])
+        return order
+
+    def mines_nonmines(self, stats=None):
+        """Returns the interior cells that are mines in every model of the
+        window and the ones that are mines in none, or (False, False) once
+        every interior cell was seen both ways"""
+        needed = [mines for mines, variables, free in self.constraints]
+        unassigned = [len(variables)
+                      for mines, variables, free in self.constraints]
+        free = [free for mines, variables, free in self.constraints]
+        cell_constraints = self.cell_constraints
+        assignment = [0] * len(self.cells)
+        interior = self.interior
+        exterior = self.exterior
+        # bit 0: seen as a safe cell, bit 1: seen as a mine
+        seen = [0] * len(interior)
+        counts = [0, 0]  # interior models, exterior nodes
+
+        def assign(i, value):
+            valid = True
+            for k in cell_constraints[i]:
+                unassigned[k] -= 1
+                needed[k] -= value
+                if needed[k] < 0 or needed[k] > unassigned[k] + free[k]:
+                    valid = False
+            return valid
+
+        def unassign(i, value):
+            for k in cell_constraints[i]:
+                unassigned[k] += 1
+                needed[k] += value
+
+        def extend(j):
+            counts[1] += 1
+            if j == len(exterior):
+                return True
+            i = exterior[j]
+            for value in (0, 1):
+                valid = assign(i, value)
+                found = valid and extend(j + 1)
+                unassign(i, value)
+                if found:
+                    return True
+            return False
+
+        def search(j):
+            """Returns True to stop once nothing can be deduced"""
+            if j == len(interior):
+                counts[0] += 1
+                if extend(0):
+                    done = True
+                    for n, i in enumerate(interior):
+                        seen[n] |= 1 << assignment[i]
+                        done = done and seen[n] == 3
+                    return done
+                return False
+            i = interior[j]
+            for value in (0, 1):
+                assignment[i] = value
+                valid = assign(i, value)
+                stop = valid and search(j + 1)
+                unassign(i, value)
+                if stop:
+                    return True
+            assignment[i] = 0
+            return False
+
+        stop = search(0)
+        self.interior_models, self.exterior_nodes = counts
+        if stats is not None:
+            stats.add('interior_models', counts[0])
+            stats.add('exterior_nodes', counts[1])
+        if stop:
+            return False, False
+        if not any(seen):  # no model at all, the board is inconsistent
+            return [], []
+        return ([self.cells[i] for n, i in enumerate(interior)
+                 if seen[n] == 2],
+                [self.cells[i] for n, i in enumerate(interior)
+                 if seen[n] == 1])
+
+
+def _mines_nonmines_task(model):
+    result = model.mines_nonmines()
+    return result, model.interior_models, model.exterior_nodes
+
+
+def enumerate_windows(models, executor=None, stats=None):
+    """Returns the mines_nonmines result of every window model, through
+    executor.map if one is given so that the windows are searched
+    concurrently in a thread or process pool. Models are read-only copies
+    of their windows, so they need nothing from the engine"""
+    if executor is None or len(models) < 2:
+        return [model.mines_nonmines(stats) for model in models]
+    results = []
+    for result, interior_models, exterior_nodes in executor.map(
+            _mines_nonmines_task, models):
+        if stats is not None:
+            stats.add('interior_models', interior_models)
+            stats.add('exterior_nodes', exterior_nodes)
+        results.append(result)
+    return results